@@ -45,6 +45,10 @@ LYMPH_NODES_RANGE = {
 CONFIDENCE_THRESHOLD = 0.6
 MIN_TEXT_LENGTH = 100
 
+# OCR Settings
+# Worker processes per PDF; kept small since several sessions may OCR at once
+OCR_CONCURRENCY = int(os.getenv("OCR_CONCURRENCY", "2"))
+
 # Cancer Type Keywords
 CANCER_TYPE_KEYWORDS = {
     "gallbladder": ["gallbladder", "gb carcinoma", "cholangiocarcinoma"],
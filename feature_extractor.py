@@ -39,6 +39,13 @@ class MedicalFeatures:
         if self.extracted_values is None:
             self.extracted_values = {}
     
+    def __setattr__(self, name: str, value: Any):
+        # Stagers look depth up case-sensitively, so normalize it on every
+        # assignment (including the constructor's); None means no depth
+        if name == "tumor_depth":
+            value = (value or "").lower()
+        super().__setattr__(name, value)
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary."""
         return asdict(self)
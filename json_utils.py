@@ -0,0 +1,30 @@
+"""
+JSON helpers shared by the OncoStaging modules.
+Uses orjson when it is installed and falls back to the standard library.
+"""
+
+import json
+from typing import Any
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def json_loads(data: str) -> Any:
+    """Decode JSON with orjson when installed, else the stdlib parser."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_export_bytes(obj: Any) -> bytes:
+    """Encode JSON for download as UTF-8 bytes with 2-space indent; non-JSON types fall back to str()."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            obj, default=str,
+            option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC
+        )
+    return json.dumps(obj, indent=2, default=str).encode("utf-8")
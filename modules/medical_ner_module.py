@@ -3,9 +3,17 @@ Module 2: Medical Data Extraction using LLM + NER
 Advanced medical entity extraction using sciSpaCy, medspaCy and DeepSeek LLM
 """
 
+import copy
+import functools
+import hashlib
 import logging
+import threading
 import json
 import re
+import sys
+from bisect import bisect_right
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, List, Any, Optional, Tuple, Set
 from dataclasses import dataclass, field
 import time
@@ -13,17 +21,22 @@ from datetime import datetime
 
 import streamlit as st
 import spacy
+import numpy as np
 import pandas as pd
 from spacy.matcher import Matcher
 from spacy.tokens import Span
 
 from ai_integration import MedicalAIAssistant
 from exceptions import FeatureExtractionError
+from json_utils import json_export_bytes, json_loads
 
 logger = logging.getLogger(__name__)
 
+# Entities are allocated per match, so drop the per-instance __dict__ where supported (3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+
+@dataclass(**_DATACLASS_SLOTS)
 class MedicalEntity:
     """Structure for medical entities with confidence and context."""
     text: str
@@ -31,9 +44,18 @@ class MedicalEntity:
     start: int
     end: int
     confidence: float
-    context: str = ""
     normalized_value: str = ""
     
+    # Context is kept as bounds into the source text and only sliced on access
+    _text_ref: str = field(default="", repr=False, compare=False)
+    _ctx_start: int = field(default=0, repr=False, compare=False)
+    _ctx_end: int = field(default=0, repr=False, compare=False)
+    
+    @property
+    def context(self) -> str:
+        """Text surrounding the entity."""
+        return self._text_ref[self._ctx_start:self._ctx_end].strip()
+    
     def to_dict(self) -> Dict[str, Any]:
         return {
             "text": self.text,
@@ -46,7 +68,7 @@ class MedicalEntity:
         }
 
 
-@dataclass
+@dataclass(**_DATACLASS_SLOTS)
 class MedicalExtractionResult:
     """Complete medical extraction results."""
     
@@ -71,6 +93,9 @@ class MedicalExtractionResult:
     # Report Sections
     report_sections: Dict[str, Any] = field(default_factory=dict)
     
+    # Study Information
+    study_info: Dict[str, Any] = field(default_factory=dict)
+    
     # Processing Metadata
     extraction_metadata: Dict[str, Any] = field(default_factory=dict)
     
@@ -91,104 +116,258 @@ class MedicalExtractionResult:
         }
 
 
+@functools.lru_cache(maxsize=1)
+def _iso_timestamp(epoch_second: int) -> str:
+    """Format a whole-second epoch timestamp as local ISO 8601."""
+    return datetime.fromtimestamp(epoch_second).isoformat()
+
+
+def _iso_now() -> str:
+    """Current local time in ISO 8601, reused within the same second."""
+    return _iso_timestamp(int(time.time()))
+
+
+def _context_bounds(text: str, start: int, end: int, context_size: int = 50) -> Tuple[int, int]:
+    """Get context bounds around an entity."""
+    return max(0, start - context_size), min(len(text), end + context_size)
+
+
+def _drop_overlapping(entities: List[MedicalEntity]) -> List[MedicalEntity]:
+    """
+    Remove overlapping matches of the same label.
+    
+    Entities are taken in priority order (earlier patterns first) and each
+    one is kept unless it overlaps a match already kept, so a broader,
+    lower-priority pattern never evicts a higher-priority hit. Survivors
+    are returned in their original order.
+    """
+    if len(entities) < 2:
+        return entities
+    
+    # Kept spans never overlap, so sorting them by start also sorts their ends
+    kept_starts: List[int] = []
+    kept_ends: List[int] = []
+    survivors = []
+    for entity in entities:
+        i = bisect_right(kept_starts, entity.start)
+        if i and kept_ends[i - 1] > entity.start:
+            continue  # Overlaps the kept span starting at or before it
+        if i < len(kept_starts) and kept_starts[i] < entity.end:
+            continue  # Overlaps the kept span starting after it
+        kept_starts.insert(i, entity.start)
+        kept_ends.insert(i, entity.end)
+        survivors.append(entity)
+    
+    return survivors
+
+
+# A complete T, N and M classification written together, e.g. "cT2 N1 M0" or "T2N1M0"
+_TNM_GROUP_RE = re.compile(
+    r"\b[cCpP]?[tT][0-4][a-cA-C]?(?:[iI][sS])?[\s,]*"
+    r"[cCpP]?[nN][0-3][a-cA-C]?[\s,]*"
+    r"[cCpP]?[mM][0-1][a-cA-C]?\b"
+)
+
+# TNM category letter (after any c/p prefix) -> tnm_staging field
+_TNM_FIELDS = {"T": "t_stage", "N": "n_stage", "M": "m_stage"}
+
+
+def _tnm_field(entity: MedicalEntity) -> str:
+    """Map a tnm_staging pattern entity to its tnm_staging field; stage groups are overall_stage."""
+    return _TNM_FIELDS.get(entity.text.lstrip("cCpP")[:1].upper(), "overall_stage")
+
+
+@functools.lru_cache(maxsize=1)
+def _get_medical_patterns() -> Dict[str, List[str]]:
+    """Build the regex patterns for PET scan reports once per process."""
+    return {
+        "patient_id": [
+            r"(?:patient|pt|mrn|medical record|id|number)[\s:#]*([A-Z0-9\-]{5,15})",
+            r"(?:^|\n)([A-Z0-9\-]{6,12})(?=\s|$)",
+        ],
+    
+        "age": [
+            r"\b(?:age|aged)\b[\s:]*(\d{1,3})\b[\s]*(?:years?|yrs?|y\.o\.?)?",
+            r"\b(\d{1,3})[\s]*(?:year|yr)[\s]*old",
+            r"(?:^|\s)(\d{2,3})[\s]*(?:years?|yrs?)[\s]*(?:old|of age)",
+        ],
+    
+        "gender": [
+            r"(?:sex|gender)[\s:]*([mf]ale|man|woman)",
+            r"\b([mf]ale)\b",
+            r"\b(man|woman)\b",
+        ],
+    
+        "cancer_type": [
+            r"(adenocarcinoma|carcinoma|sarcoma|lymphoma|melanoma|leukemia)",
+            r"(lung|breast|colon|prostate|liver|pancreatic|gastric|esophageal|ovarian|cervical|kidney|bladder)[\s]*(?:cancer|carcinoma|adenocarcinoma)",
+            r"(?:primary|diagnosis)[\s:]*([^.\n]+(?:cancer|carcinoma|adenocarcinoma|sarcoma))",
+        ],
+    
+        "tumor_size": [
+            r"(?:size|measuring|measures|dimensions?)[\s:]*(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))",
+            r"(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))[\s]*(?:mass|tumor|lesion|nodule)",
+            r"(?:tumor|mass|lesion|nodule)[\s]*(?:of|measuring)?[\s]*(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))",
+        ],
+    
+        "suv_values": [
+            r"SUV[\s]*(?:max|peak|mean)?[\s:]*(\d+(?:\.\d+)?)",
+            r"(?:maximum|peak|mean)[\s]*SUV[\s:]*(\d+(?:\.\d+)?)",
+            r"standardized uptake value[\s:]*(\d+(?:\.\d+)?)",
+        ],
+    
+        # Case handled explicitly so this label can be scanned without re.IGNORECASE
+        "tnm_staging": [
+            r"\b([cCpP]?[tT][0-4][a-cA-C]?(?:[iI][sS])?)\b",
+            r"\b([cCpP]?[nN][0-3][a-cA-C]?)\b", 
+            r"\b([cCpP]?[mM][0-1][a-cA-C]?)\b",
+            r"(?i:stage|staging)[\s:]*([IVXivx]+[a-cA-C]?)",
+        ],
+    
+        "lymph_nodes": [
+            r"(\d+)[\s]*(?:positive|involved|enlarged|abnormal)?[\s]*(?:lymph[\s]*)?nodes?",
+            r"(?:lymph[\s]*)?nodes?[\s:]*(\d+)[\s]*(?:positive|involved|enlarged)",
+            r"(?:positive|involved)[\s]*(?:lymph[\s]*)?nodes?[\s:]*(\d+)",
+        ],
+    
+        "metastases": [
+            r"(?:metastases?|metastatic)[\s]*(?:to|in|involving)?[\s]*([^.\n]+)",
+            r"(?:secondary|distant)[\s]*(?:deposits?|disease)[\s]*(?:in|to)?[\s]*([^.\n]+)",
+            r"(?:spread|involvement)[\s]*(?:to|of)[\s]*([^.\n]+)",
+        ],
+    
+        "study_date": [
+            r"(?:date|study date|scan date)[\s:]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})",
+            r"(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})",
+            r"(\d{4}[\/\-]\d{1,2}[\/\-]\d{1,2})",
+        ]
+    }
+
+
+# Labels whose patterns spell out both cases, avoiding per-character case folding
+_CASE_SENSITIVE_LABELS = frozenset({"tnm_staging"})
+
+
+@functools.lru_cache(maxsize=1)
+def _get_label_regexes() -> Dict[str, List[Tuple[re.Pattern, int]]]:
+    """
+    Compile the patterns of each entity label once per process.
+    
+    Patterns are kept separate (in priority order) rather than joined into
+    one alternation, so a lower-priority pattern cannot consume text that a
+    higher-priority one would have matched. Each entry pairs the compiled
+    pattern with the group holding the value (its first group, or 0).
+    """
+    return {
+        label: [
+            (regex, 1 if regex.groups else 0)
+            for regex in (
+                re.compile(pattern, 0 if label in _CASE_SENSITIVE_LABELS else re.IGNORECASE)
+                for pattern in patterns
+            )
+        ]
+        for label, patterns in _get_medical_patterns().items()
+    }
+
+
+def _add_custom_patterns(matcher: Matcher):
+    """Add custom patterns for PET scan specific entities."""
+    # SUV patterns
+    suv_pattern = [
+        {"LOWER": {"IN": ["suv", "standardized"]}, "OP": "?"},
+        {"LOWER": {"IN": ["uptake", "max", "peak", "mean"]}, "OP": "?"},
+        {"LOWER": {"IN": ["value", "="]} , "OP": "?"},
+        {"LIKE_NUM": True}
+    ]
+    matcher.add("SUV_VALUE", [suv_pattern])
+    
+    # TNM patterns
+    tnm_patterns = [
+        [{"TEXT": {"REGEX": r"[cPp]?T[0-4][a-c]?(?:is)?"}}],
+        [{"TEXT": {"REGEX": r"[cPp]?N[0-3][a-c]?"}}],
+        [{"TEXT": {"REGEX": r"[cPp]?M[0-1][a-c]?"}}],
+    ]
+    matcher.add("TNM_STAGE", tnm_patterns)
+    
+    # Cancer type patterns
+    cancer_patterns = [
+        [{"LOWER": {"IN": ["lung", "breast", "colon", "prostate"]}}, 
+         {"LOWER": {"IN": ["cancer", "carcinoma", "adenocarcinoma"]}}],
+    ]
+    matcher.add("CANCER_TYPE", cancer_patterns)
+
+
+@functools.lru_cache(maxsize=1)
+def _get_spacy_pipeline() -> Tuple[Optional[Any], Optional[Matcher]]:
+    """
+    Load the spaCy pipeline and custom matcher once per process.
+    
+    Model loading is slow and memory heavy, and Streamlit re-creates the
+    NER objects on every rerun, so the loaded pipeline is shared.
+    """
+    try:
+        # Try to load en_core_sci_sm model
+        import en_core_sci_sm
+        nlp = en_core_sci_sm.load()
+        
+        # Add custom patterns using Matcher
+        matcher = Matcher(nlp.vocab)
+        _add_custom_patterns(matcher)
+        
+        logger.info("sciSpaCy models loaded successfully")
+        return nlp, matcher
+        
+    except ImportError:
+        logger.warning("sciSpaCy models not available. Install with: pip install scispacy")
+        # Fallback to standard English model
+        try:
+            nlp = spacy.load("en_core_web_sm")
+            matcher = Matcher(nlp.vocab)
+            _add_custom_patterns(matcher)
+            return nlp, matcher
+        except OSError:
+            logger.error("No spaCy models available. Please install: python -m spacy download en_core_web_sm")
+            return None, None
+
+
 class MedicalPatternMatcher:
     """Pattern matching for medical entities using regex and spaCy patterns."""
     
     def __init__(self):
         self.patterns = self._create_medical_patterns()
+        self._label_regexes = _get_label_regexes()
         
     def _create_medical_patterns(self) -> Dict[str, List[Dict]]:
         """Create comprehensive medical patterns for PET scan reports."""
-        return {
-            "patient_id": [
-                r"(?:patient|pt|mrn|medical record|id|number)[\s:#]*([A-Z0-9\-]{5,15})",
-                r"(?:^|\n)([A-Z0-9\-]{6,12})(?=\s|$)",
-            ],
-            
-            "age": [
-                r"(?:age|aged)[\s:]*(\d{1,3})[\s]*(?:years?|yrs?|y\.o\.?)?",
-                r"(\d{1,3})[\s]*(?:year|yr)[\s]*old",
-                r"(?:^|\s)(\d{2,3})[\s]*(?:years?|yrs?)[\s]*(?:old|of age)",
-            ],
-            
-            "gender": [
-                r"(?:sex|gender)[\s:]*([mf]ale|man|woman)",
-                r"\b([mf]ale)\b",
-                r"\b(man|woman)\b",
-            ],
-            
-            "cancer_type": [
-                r"(adenocarcinoma|carcinoma|sarcoma|lymphoma|melanoma|leukemia)",
-                r"(lung|breast|colon|prostate|liver|pancreatic|gastric|esophageal|ovarian|cervical|kidney|bladder)[\s]*(?:cancer|carcinoma|adenocarcinoma)",
-                r"(?:primary|diagnosis)[\s:]*([^.\n]+(?:cancer|carcinoma|adenocarcinoma|sarcoma))",
-            ],
-            
-            "tumor_size": [
-                r"(?:size|measuring|measures|dimensions?)[\s:]*(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))",
-                r"(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))[\s]*(?:mass|tumor|lesion|nodule)",
-                r"(?:tumor|mass|lesion|nodule)[\s]*(?:of|measuring)?[\s]*(\d+(?:\.\d+)?[\s]*(?:x[\s]*\d+(?:\.\d+)?)*[\s]*(?:cm|mm))",
-            ],
-            
-            "suv_values": [
-                r"SUV[\s]*(?:max|peak|mean)?[\s:]*(\d+(?:\.\d+)?)",
-                r"(?:maximum|peak|mean)[\s]*SUV[\s:]*(\d+(?:\.\d+)?)",
-                r"standardized uptake value[\s:]*(\d+(?:\.\d+)?)",
-            ],
-            
-            "tnm_staging": [
-                r"\b([cpP]?T[0-4][a-c]?(?:is)?)\b",
-                r"\b([cpP]?N[0-3][a-c]?)\b", 
-                r"\b([cpP]?M[0-1][a-c]?)\b",
-                r"(?:stage|staging)[\s:]*([IVX]+[ABC]?)",
-            ],
-            
-            "lymph_nodes": [
-                r"(\d+)[\s]*(?:positive|involved|enlarged|abnormal)?[\s]*(?:lymph[\s]*)?nodes?",
-                r"(?:lymph[\s]*)?nodes?[\s:]*(\d+)[\s]*(?:positive|involved|enlarged)",
-                r"(?:positive|involved)[\s]*(?:lymph[\s]*)?nodes?[\s:]*(\d+)",
-            ],
-            
-            "metastases": [
-                r"(?:metastases?|metastatic)[\s]*(?:to|in|involving)?[\s]*([^.\n]+)",
-                r"(?:secondary|distant)[\s]*(?:deposits?|disease)[\s]*(?:in|to)?[\s]*([^.\n]+)",
-                r"(?:spread|involvement)[\s]*(?:to|of)[\s]*([^.\n]+)",
-            ],
-            
-            "study_date": [
-                r"(?:date|study date|scan date)[\s:]*(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})",
-                r"(\d{1,2}[\/\-]\d{1,2}[\/\-]\d{2,4})",
-                r"(\d{4}[\/\-]\d{1,2}[\/\-]\d{1,2})",
-            ]
-        }
+        return _get_medical_patterns()
     
     def extract_patterns(self, text: str) -> Dict[str, List[MedicalEntity]]:
         """Extract medical entities using pattern matching."""
         entities_by_type = {}
         
-        for entity_type, patterns in self.patterns.items():
+        for entity_type, regexes in self._label_regexes.items():
+            # Patterns run in priority order, so earlier patterns come first in the output
             entities = []
             
-            for pattern in patterns:
-                matches = re.finditer(pattern, text, re.IGNORECASE)
-                
-                for match in matches:
-                    # Get context (50 chars before and after)
-                    start_ctx = max(0, match.start() - 50)
-                    end_ctx = min(len(text), match.end() + 50)
-                    context = text[start_ctx:end_ctx]
+            for regex, value_group in regexes:
+                for match in regex.finditer(text):
+                    # Context spans 50 chars before and after
+                    start_ctx, end_ctx = _context_bounds(text, match.start(), match.end())
                     
                     entity = MedicalEntity(
-                        text=match.group(1) if match.groups() else match.group(0),
+                        text=match.group(value_group),
                         label=entity_type,
                         start=match.start(),
                         end=match.end(),
                         confidence=0.8,  # Pattern matching confidence
-                        context=context.strip()
+                        _text_ref=text,
+                        _ctx_start=start_ctx,
+                        _ctx_end=end_ctx
                     )
                     
                     entities.append(entity)
             
-            entities_by_type[entity_type] = entities
+            entities_by_type[entity_type] = _drop_overlapping(entities)
         
         return entities_by_type
 
@@ -202,58 +381,10 @@ class SciSpaCyNER:
         self._load_models()
     
     def _load_models(self):
-        """Load sciSpaCy medical models."""
-        try:
-            # Try to load en_core_sci_sm model
-            import en_core_sci_sm
-            self.nlp = en_core_sci_sm.load()
-            
-            # Add custom patterns using Matcher
-            self.matcher = Matcher(self.nlp.vocab)
-            self._add_custom_patterns()
-            
-            logger.info("sciSpaCy models loaded successfully")
-            
-        except ImportError:
-            logger.warning("sciSpaCy models not available. Install with: pip install scispacy")
-            # Fallback to standard English model
-            try:
-                self.nlp = spacy.load("en_core_web_sm")
-                self.matcher = Matcher(self.nlp.vocab)
-                self._add_custom_patterns()
-            except OSError:
-                logger.error("No spaCy models available. Please install: python -m spacy download en_core_web_sm")
-                self.nlp = None
-    
-    def _add_custom_patterns(self):
-        """Add custom patterns for PET scan specific entities."""
-        if not self.matcher:
-            return
-            
-        # SUV patterns
-        suv_pattern = [
-            {"LOWER": {"IN": ["suv", "standardized"]}, "OP": "?"},
-            {"LOWER": {"IN": ["uptake", "max", "peak", "mean"]}, "OP": "?"},
-            {"LOWER": {"IN": ["value", "="]} , "OP": "?"},
-            {"LIKE_NUM": True}
-        ]
-        self.matcher.add("SUV_VALUE", [suv_pattern])
-        
-        # TNM patterns
-        tnm_patterns = [
-            [{"TEXT": {"REGEX": r"[cPp]?T[0-4][a-c]?(?:is)?"}}],
-            [{"TEXT": {"REGEX": r"[cPp]?N[0-3][a-c]?"}}],
-            [{"TEXT": {"REGEX": r"[cPp]?M[0-1][a-c]?"}}],
-        ]
-        self.matcher.add("TNM_STAGE", tnm_patterns)
-        
-        # Cancer type patterns
-        cancer_patterns = [
-            [{"LOWER": {"IN": ["lung", "breast", "colon", "prostate"]}}, 
-             {"LOWER": {"IN": ["cancer", "carcinoma", "adenocarcinoma"]}}],
-        ]
-        self.matcher.add("CANCER_TYPE", cancer_patterns)
+        """Load sciSpaCy medical models (shared across instances)."""
+        self.nlp, self.matcher = _get_spacy_pipeline()
     
+
     def extract_entities(self, text: str) -> List[MedicalEntity]:
         """Extract medical entities using sciSpaCy."""
         if not self.nlp:
@@ -266,13 +397,16 @@ class SciSpaCyNER:
             
             # Extract named entities
             for ent in doc.ents:
+                start_ctx, end_ctx = _context_bounds(text, ent.start_char, ent.end_char)
                 entity = MedicalEntity(
                     text=ent.text,
                     label=ent.label_,
                     start=ent.start_char,
                     end=ent.end_char,
                     confidence=0.7,  # sciSpaCy confidence
-                    context=self._get_context(text, ent.start_char, ent.end_char)
+                    _text_ref=text,
+                    _ctx_start=start_ctx,
+                    _ctx_end=end_ctx
                 )
                 entities.append(entity)
             
@@ -281,13 +415,16 @@ class SciSpaCyNER:
                 matches = self.matcher(doc)
                 for match_id, start, end in matches:
                     span = doc[start:end]
+                    start_ctx, end_ctx = _context_bounds(text, span.start_char, span.end_char)
                     entity = MedicalEntity(
                         text=span.text,
                         label=self.nlp.vocab.strings[match_id],
                         start=span.start_char,
                         end=span.end_char,
                         confidence=0.8,  # Pattern match confidence
-                        context=self._get_context(text, span.start_char, span.end_char)
+                        _text_ref=text,
+                        _ctx_start=start_ctx,
+                        _ctx_end=end_ctx
                     )
                     entities.append(entity)
             
@@ -295,17 +432,114 @@ class SciSpaCyNER:
             logger.error(f"sciSpaCy NER failed: {e}")
         
         return entities
+
+
+def _find_json_span(s: str) -> Optional[Tuple[int, int]]:
+    """
+    Find the first balanced top-level ``{...}`` span in a string.
+    
+    Single linear pass tracking brace depth; braces inside JSON strings
+    (including escaped quotes) are ignored.
+    """
+    start = s.find('{')
+    if start == -1:
+        return None
     
-    def _get_context(self, text: str, start: int, end: int, context_size: int = 50) -> str:
-        """Get context around entity."""
-        start_ctx = max(0, start - context_size)
-        end_ctx = min(len(text), end + context_size)
-        return text[start_ctx:end_ctx].strip()
+    depth = 0
+    in_string = False
+    escaped = False
+    for i in range(start, len(s)):
+        char = s[i]
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char == '{':
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                return start, i + 1
+    
+    return None
 
 
 class DeepSeekMedicalNER:
     """Medical NER using DeepSeek LLM with structured prompts."""
     
+    # Constant parts of the extraction prompt; only the report text varies per call
+    _PROMPT_PREFIX = """You are a medical information extraction specialist. Extract structured data from this PET/CT scan report.
+
+REPORT TEXT:
+"""
+    
+    _PROMPT_SUFFIX = """
+
+Extract information in JSON format with confidence scores:
+
+{
+    "patient_info": {
+        "patient_id": {"value": "", "confidence": 0.0},
+        "age": {"value": "", "confidence": 0.0},
+        "gender": {"value": "", "confidence": 0.0}
+    },
+    "cancer_info": {
+        "cancer_type": {"value": "", "confidence": 0.0},
+        "primary_site": {"value": "", "confidence": 0.0},
+        "histology": {"value": "", "confidence": 0.0}
+    },
+    "tumor_info": {
+        "tumor_size": {"value": "", "confidence": 0.0},
+        "tumor_location": {"value": "", "confidence": 0.0},
+        "tumor_description": {"value": "", "confidence": 0.0}
+    },
+    "pet_metrics": {
+        "suv_max": {"value": "", "confidence": 0.0},
+        "suv_peak": {"value": "", "confidence": 0.0},
+        "suv_mean": {"value": "", "confidence": 0.0},
+        "metabolic_tumor_volume": {"value": "", "confidence": 0.0},
+        "total_lesion_glycolysis": {"value": "", "confidence": 0.0}
+    },
+    "tnm_staging": {
+        "t_stage": {"value": "", "confidence": 0.0},
+        "n_stage": {"value": "", "confidence": 0.0},
+        "m_stage": {"value": "", "confidence": 0.0},
+        "overall_stage": {"value": "", "confidence": 0.0}
+    },
+    "clinical_findings": {
+        "lymph_nodes_involved": {"value": "", "confidence": 0.0},
+        "lymph_node_stations": {"value": [], "confidence": 0.0},
+        "metastatic_sites": {"value": [], "confidence": 0.0},
+        "additional_findings": {"value": [], "confidence": 0.0}
+    },
+    "report_sections": {
+        "impression": {"value": "", "confidence": 0.0},
+        "findings": {"value": "", "confidence": 0.0},
+        "comparison": {"value": "", "confidence": 0.0},
+        "technique": {"value": "", "confidence": 0.0}
+    },
+    "study_info": {
+        "study_date": {"value": "", "confidence": 0.0},
+        "study_type": {"value": "", "confidence": 0.0},
+        "referring_physician": {"value": "", "confidence": 0.0}
+    }
+}
+
+EXTRACTION RULES:
+1. Extract only explicitly mentioned information
+2. Use "Not specified" for missing data
+3. Confidence: 0.9-1.0 (explicit), 0.7-0.8 (inferred), 0.0-0.6 (uncertain)
+4. For lists, extract all relevant items
+5. Preserve medical terminology accuracy
+6. Focus on oncological findings
+
+JSON OUTPUT:"""
+    
     def __init__(self, ai_assistant: MedicalAIAssistant):
         self.ai_assistant = ai_assistant
     
@@ -335,84 +569,30 @@ class DeepSeekMedicalNER:
     
     def _create_extraction_prompt(self, text: str) -> str:
         """Create structured extraction prompt for DeepSeek."""
-        prompt = f"""You are a medical information extraction specialist. Extract structured data from this PET/CT scan report.
-
-REPORT TEXT:
-{text}
-
-Extract information in JSON format with confidence scores:
-
-{{
-    "patient_info": {{
-        "patient_id": {{"value": "", "confidence": 0.0}},
-        "age": {{"value": "", "confidence": 0.0}},
-        "gender": {{"value": "", "confidence": 0.0}}
-    }},
-    "cancer_info": {{
-        "cancer_type": {{"value": "", "confidence": 0.0}},
-        "primary_site": {{"value": "", "confidence": 0.0}},
-        "histology": {{"value": "", "confidence": 0.0}}
-    }},
-    "tumor_info": {{
-        "tumor_size": {{"value": "", "confidence": 0.0}},
-        "tumor_location": {{"value": "", "confidence": 0.0}},
-        "tumor_description": {{"value": "", "confidence": 0.0}}
-    }},
-    "pet_metrics": {{
-        "suv_max": {{"value": "", "confidence": 0.0}},
-        "suv_peak": {{"value": "", "confidence": 0.0}},
-        "suv_mean": {{"value": "", "confidence": 0.0}},
-        "metabolic_tumor_volume": {{"value": "", "confidence": 0.0}},
-        "total_lesion_glycolysis": {{"value": "", "confidence": 0.0}}
-    }},
-    "tnm_staging": {{
-        "t_stage": {{"value": "", "confidence": 0.0}},
-        "n_stage": {{"value": "", "confidence": 0.0}},
-        "m_stage": {{"value": "", "confidence": 0.0}},
-        "overall_stage": {{"value": "", "confidence": 0.0}}
-    }},
-    "clinical_findings": {{
-        "lymph_nodes_involved": {{"value": "", "confidence": 0.0}},
-        "lymph_node_stations": {{"value": [], "confidence": 0.0}},
-        "metastatic_sites": {{"value": [], "confidence": 0.0}},
-        "additional_findings": {{"value": [], "confidence": 0.0}}
-    }},
-    "report_sections": {{
-        "impression": {{"value": "", "confidence": 0.0}},
-        "findings": {{"value": "", "confidence": 0.0}},
-        "comparison": {{"value": "", "confidence": 0.0}},
-        "technique": {{"value": "", "confidence": 0.0}}
-    }},
-    "study_info": {{
-        "study_date": {{"value": "", "confidence": 0.0}},
-        "study_type": {{"value": "", "confidence": 0.0}},
-        "referring_physician": {{"value": "", "confidence": 0.0}}
-    }}
-}}
-
-EXTRACTION RULES:
-1. Extract only explicitly mentioned information
-2. Use "Not specified" for missing data
-3. Confidence: 0.9-1.0 (explicit), 0.7-0.8 (inferred), 0.0-0.6 (uncertain)
-4. For lists, extract all relevant items
-5. Preserve medical terminology accuracy
-6. Focus on oncological findings
-
-JSON OUTPUT:"""
-        
-        return prompt
+        return self._PROMPT_PREFIX + text + self._PROMPT_SUFFIX
     
     def _parse_llm_response(self, response: str) -> Dict[str, Any]:
         """Parse LLM JSON response."""
         try:
-            # Try to find JSON in response
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
-            if json_match:
-                json_str = json_match.group()
-                return json.loads(json_str)
-            else:
-                # Try parsing entire response
-                return json.loads(response)
+            # Fast path: outermost braces (clean JSON or JSON with prose around it)
+            start = response.find('{')
+            end = response.rfind('}')
+            if start != -1 and end > start:
+                try:
+                    return json_loads(response[start:end + 1])
+                except json.JSONDecodeError:
+                    pass
+                
+                # Trailing fragments after the object: take the first balanced span
+                span = _find_json_span(response)
+                if span:
+                    try:
+                        return json_loads(response[span[0]:span[1]])
+                    except json.JSONDecodeError:
+                        pass
+            
+            # Try parsing entire response
+            return json_loads(response)
                 
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse LLM response: {e}")
@@ -440,7 +620,7 @@ JSON OUTPUT:"""
         # Add metadata
         result.extraction_metadata = {
             "extraction_method": "deepseek_llm",
-            "extraction_timestamp": datetime.now().isoformat(),
+            "extraction_timestamp": _iso_now(),
             "text_length": len(original_text),
             "overall_confidence": self._calculate_overall_confidence(data)
         }
@@ -449,30 +629,47 @@ JSON OUTPUT:"""
     
     def _calculate_overall_confidence(self, data: Dict[str, Any]) -> float:
         """Calculate overall extraction confidence."""
-        all_confidences = []
-        
-        for section_data in data.values():
-            if isinstance(section_data, dict):
-                for value_conf in section_data.values():
-                    if isinstance(value_conf, dict) and "confidence" in value_conf:
-                        all_confidences.append(value_conf["confidence"])
-        
-        return sum(all_confidences) / len(all_confidences) if all_confidences else 0.5
+        confidences = np.fromiter(
+            (value_conf["confidence"]
+             for section_data in data.values() if isinstance(section_data, dict)
+             for value_conf in section_data.values()
+             if isinstance(value_conf, dict) and "confidence" in value_conf),
+            dtype=np.float64
+        )
+        
+        return float(confidences.mean()) if confidences.size else 0.5
+
+
+@functools.lru_cache(maxsize=1)
+def _get_ai_assistant() -> MedicalAIAssistant:
+    """Create the AI assistant (and its HTTP client) once per process."""
+    return MedicalAIAssistant()
 
 
 class MedicalNERModule:
     """Combined medical NER module using multiple approaches."""
     
+    # Number of (text, use_llm) extraction results kept in memory
+    CACHE_SIZE = 64
+    
+    # Pattern labels that must all be found for the LLM call to be skipped
+    REGEX_REQUIRED_FIELDS = ("age", "cancer_type", "suv_values", "tnm_staging", "lymph_nodes", "metastases")
+    
     def __init__(self):
         self.pattern_matcher = MedicalPatternMatcher()
         self.scispacy_ner = SciSpaCyNER()
-        self.ai_assistant = MedicalAIAssistant()
+        self.ai_assistant = _get_ai_assistant()
         self.deepseek_ner = DeepSeekMedicalNER(self.ai_assistant)
+        self._cache: "OrderedDict[Tuple[str, bool], MedicalExtractionResult]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def extract_medical_data(self, text: str, use_llm: bool = True) -> MedicalExtractionResult:
         """
         Extract medical data using combined NER approaches.
         
+        Results are cached on a hash of the text, since Streamlit reruns
+        the extraction with identical input.
+        
         Args:
             text: Input medical text
             use_llm: Whether to use LLM extraction
@@ -480,18 +677,49 @@ class MedicalNERModule:
         Returns:
             MedicalExtractionResult with extracted data
         """
-        start_time = time.time()
+        key = (hashlib.blake2b(text.encode("utf-8"), digest_size=16).hexdigest(), use_llm)
         
-        if use_llm:
-            # Primary: Use DeepSeek LLM for structured extraction
-            result = self.deepseek_ner.extract_structured_data(text)
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return copy.deepcopy(cached)
+        
+        result = self._extract_uncached(text, use_llm)
+        
+        with self._cache_lock:
+            self._cache[key] = copy.deepcopy(result)
+            if len(self._cache) > self.CACHE_SIZE:
+                self._cache.popitem(last=False)
+        
+        return result
+    
+    def _extract_uncached(self, text: str, use_llm: bool) -> MedicalExtractionResult:
+        """Run the extraction pipeline without consulting the cache."""
+        start_time = time.monotonic()
+        
+        # Cheap regex pass first; the LLM is only needed when it leaves gaps
+        pattern_entities = self.pattern_matcher.extract_patterns(text)
+        llm_needed = use_llm and not self._regex_covered(text, pattern_entities)
+        
+        if llm_needed:
+            # Primary: Use DeepSeek LLM for structured extraction. The LLM call is
+            # network bound, so sciSpaCy runs alongside it and contributes its entities.
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                llm_future = executor.submit(self.deepseek_ner.extract_structured_data, text)
+                spacy_future = executor.submit(self.scispacy_ner.extract_entities, text)
+                
+                result = llm_future.result()
+                for entities in pattern_entities.values():
+                    result.all_entities.extend(entities)
+                result.all_entities.extend(spacy_future.result())
         else:
             # Fallback: Use pattern matching and sciSpaCy
             result = MedicalExtractionResult()
             
             # Pattern matching
-            pattern_entities = self.pattern_matcher.extract_patterns(text)
             self._merge_pattern_entities(result, pattern_entities)
+            result.extraction_metadata["overall_confidence"] = self._pattern_confidence(result)
             
             # sciSpaCy NER
             spacy_entities = self.scispacy_ner.extract_entities(text)
@@ -499,13 +727,34 @@ class MedicalNERModule:
         
         # Add processing metadata
         result.extraction_metadata.update({
-            "processing_time": time.time() - start_time,
-            "llm_used": use_llm,
-            "backup_methods": not use_llm
+            "processing_time": time.monotonic() - start_time,
+            "llm_used": llm_needed,
+            "llm_skipped": use_llm and not llm_needed,
+            "backup_methods": not llm_needed
         })
         
         return result
     
+    def _regex_covered(self, text: str, pattern_entities: Dict[str, List[MedicalEntity]]) -> bool:
+        """Check whether pattern matching found every field required to skip the LLM."""
+        if not all(pattern_entities.get(label) for label in self.REGEX_REQUIRED_FIELDS):
+            return False
+        
+        # Lone T/N/M tokens are ambiguous (e.g. "T1-weighted"), so the report must
+        # state the full classification together
+        return _TNM_GROUP_RE.search(text) is not None
+    
+    @staticmethod
+    def _pattern_confidence(result: MedicalExtractionResult) -> float:
+        """Mean confidence of the fields filled from pattern matches."""
+        confidences = [
+            value
+            for section in (result.patient_info, result.cancer_info, result.tumor_info,
+                            result.pet_metrics, result.tnm_staging, result.clinical_findings)
+            for key, value in section.items() if key.endswith("_confidence")
+        ]
+        return float(np.mean(confidences)) if confidences else 0.0
+    
     def _merge_pattern_entities(self, result: MedicalExtractionResult, pattern_entities: Dict[str, List[MedicalEntity]]):
         """Merge pattern-based entities into result."""
         # Simple mapping for basic fields
@@ -516,6 +765,7 @@ class MedicalNERModule:
             "cancer_type": ("cancer_info", "cancer_type"),
             "tumor_size": ("tumor_info", "tumor_size"),
             "suv_values": ("pet_metrics", "suv_max"),
+            "lymph_nodes": ("clinical_findings", "lymph_nodes_involved"),
             "study_date": ("patient_info", "study_date")
         }
         
@@ -525,15 +775,34 @@ class MedicalNERModule:
                 section_data = getattr(result, section)
                 section_data[field] = entities[0].text  # Take first match
                 section_data[f"{field}_confidence"] = entities[0].confidence
-                
-                result.all_entities.extend(entities)
+            
+            result.all_entities.extend(entities)
+        
+        # Metastatic sites: every match, as the LLM schema lists them
+        metastases = pattern_entities.get("metastases", [])
+        if metastases:
+            result.clinical_findings["metastatic_sites"] = [entity.text.strip() for entity in metastases]
+            result.clinical_findings["metastatic_sites_confidence"] = metastases[0].confidence
+        
+        # TNM staging: first match of each T, N, M and overall stage category
+        for entity in pattern_entities.get("tnm_staging", []):
+            field = _tnm_field(entity)
+            if field not in result.tnm_staging:
+                result.tnm_staging[field] = entity.text
+                result.tnm_staging[f"{field}_confidence"] = entity.confidence
+
+
+@st.cache_resource(show_spinner=False)
+def _get_ner_module() -> MedicalNERModule:
+    """Share a single NER module across Streamlit reruns and sessions."""
+    return MedicalNERModule()
 
 
 class MedicalNERUI:
     """Streamlit UI for Medical NER Module."""
     
     def __init__(self):
-        self.ner_module = MedicalNERModule()
+        self.ner_module = _get_ner_module()
     
     def render_extraction_interface(self, text: str) -> Optional[MedicalExtractionResult]:
         """Render medical data extraction interface."""
@@ -629,26 +898,23 @@ class MedicalNERUI:
             st.info("No data extracted for this section")
             return
         
-        # Create DataFrame for better display
-        display_data = []
-        for key, value in data.items():
-            if not key.endswith("_confidence"):
-                confidence = data.get(f"{key}_confidence", 0.5)
-                
-                # Format value
-                if isinstance(value, list):
-                    formatted_value = ", ".join(str(v) for v in value) if value else "Not specified"
-                else:
-                    formatted_value = str(value) if value else "Not specified"
-                
-                display_data.append({
-                    "Field": key.replace("_", " ").title(),
-                    "Value": formatted_value,
-                    "Confidence": f"{confidence:.1%}" if isinstance(confidence, (int, float)) else "N/A"
-                })
-        
-        if display_data:
-            df = pd.DataFrame(display_data)
+        items = [(key, value) for key, value in data.items() if not key.endswith("_confidence")]
+        
+        if items:
+            # Build the DataFrame column-wise for better display
+            confidences = [data.get(f"{key}_confidence", 0.5) for key, _ in items]
+            df = pd.DataFrame({
+                "Field": [key.replace("_", " ").title() for key, _ in items],
+                "Value": [
+                    (", ".join(map(str, value)) if isinstance(value, list) else str(value))
+                    if value else "Not specified"
+                    for _, value in items
+                ],
+                "Confidence": [
+                    f"{confidence:.1%}" if isinstance(confidence, (int, float)) else "N/A"
+                    for confidence in confidences
+                ]
+            })
             st.dataframe(df, use_container_width=True, hide_index=True)
         else:
             st.info("No structured data available")
@@ -661,11 +927,11 @@ class MedicalNERUI:
         
         with col1:
             if st.button("📄 Export JSON"):
-                json_data = json.dumps(result.to_dict(), indent=2, default=str)
+                json_data = json_export_bytes(result.to_dict())
                 st.download_button(
                     label="Download JSON",
                     data=json_data,
-                    file_name=f"medical_extraction_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
+                    file_name=f"medical_extraction_{time.strftime('%Y%m%d_%H%M%S')}.json",
                     mime="application/json"
                 )
         
@@ -676,29 +942,32 @@ class MedicalNERUI:
                 st.download_button(
                     label="Download CSV", 
                     data=csv_data,
-                    file_name=f"medical_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv",
+                    file_name=f"medical_data_{time.strftime('%Y%m%d_%H%M%S')}.csv",
                     mime="text/csv"
                 )
     
     def _flatten_for_csv(self, result: MedicalExtractionResult) -> str:
         """Flatten extraction result for CSV export."""
-        rows = []
+        sections, fields, values, confidences = [], [], [], []
         
         for section_name in ["patient_info", "cancer_info", "tumor_info", "pet_metrics", 
                            "tnm_staging", "clinical_findings"]:
             section_data = getattr(result, section_name)
+            items = [(key, value) for key, value in section_data.items() if not key.endswith("_confidence")]
             
-            for key, value in section_data.items():
-                if not key.endswith("_confidence"):
-                    confidence = section_data.get(f"{key}_confidence", "N/A")
-                    
-                    rows.append({
-                        "Section": section_name.replace("_", " ").title(),
-                        "Field": key.replace("_", " ").title(),
-                        "Value": str(value) if value else "Not specified",
-                        "Confidence": f"{confidence:.1%}" if isinstance(confidence, (int, float)) else confidence
-                    })
+            sections.extend([section_name.replace("_", " ").title()] * len(items))
+            fields.extend(key.replace("_", " ").title() for key, _ in items)
+            values.extend(str(value) if value else "Not specified" for _, value in items)
+            confidences.extend(section_data.get(f"{key}_confidence", "N/A") for key, _ in items)
         
         # Convert to CSV
-        df = pd.DataFrame(rows)
+        df = pd.DataFrame({
+            "Section": sections,
+            "Field": fields,
+            "Value": values,
+            "Confidence": [
+                f"{confidence:.1%}" if isinstance(confidence, (int, float)) else confidence
+                for confidence in confidences
+            ]
+        })
         return df.to_csv(index=False)
@@ -6,73 +6,199 @@ Interactive editing with confidence scoring and validation
 import streamlit as st
 import pandas as pd
 from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime
-import json
+from datetime import date, datetime
+import functools
 import re
+from bisect import bisect_right
+
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
 
 from modules.enhanced_prompt_engine import ExtractionResult, ClinicalRecommendation
 from exceptions import MedicalDataValidationError
+from json_utils import json_export_bytes
 
 import logging
 logger = logging.getLogger(__name__)
 
+# Validation patterns, compiled once at import
+_AGE_RE = re.compile(r"^\d{1,3}$")
+_PATIENT_ID_RE = re.compile(r"^[A-Za-z0-9\-_]{3,20}$")
+_TUMOR_SIZE_RE = re.compile(r"^\d+(\.\d+)?(\s*x\s*\d+(\.\d+)?)*\s*(cm|mm)$")
+_SUV_RE = re.compile(r"^\d+(\.\d+)?$")
+_TNM_RE = re.compile(r'[cCpP]?[TtNnMm][0-4][a-c]?(?:is)?')
+_NUM_RE = re.compile(r'(\d+(?:\.\d+)?)')
+# The accepted scan date shapes: YYYY-MM-DD, or DD/MM/YYYY, MM/DD/YYYY and DD-MM-YYYY
+_DATE_RE = re.compile(r"^(?:(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})([-/])(\d{1,2})\5(\d{4}))$")
+
+# Format-quality patterns used by ConfidenceScorer
+_SUV_FORMAT_RE = re.compile(r'^\d+\.\d+$')
+_DECIMAL_RE = re.compile(r'\d+\.\d+')
+_TNM_FULL_RE = re.compile(r'T\d+N\d+M\d+')
+
+# Placeholder values treated as "no value" (compared lowercased and stripped)
+_EMPTY_VALUES = frozenset({"not specified", "not available", ""})
+
+# Terms that make a free-form cancer type plausible
+_CANCER_TERM_RE = re.compile(r"cancer|carcinoma|adenocarcinoma|sarcoma", re.I)
+
+# Supporting context keywords per field, one alternation each
+_CONTEXT_RES = {
+    "cancer_type": re.compile(r"diagnosis|primary|histology", re.I),
+    "suv_max": re.compile(r"suv|uptake|fdg", re.I),
+    "tumor_size_cm": re.compile(r"size|measure|dimension", re.I)
+}
+
+
+# Validation rules; never mutated, so every validator shares them
+_VALIDATION_RULES = {
+    "age": {
+        "type": "numeric",
+        "min": 0,
+        "max": 120,
+        "format": _AGE_RE
+    },
+    "gender": {
+        "type": "categorical",
+        "options": ["Male", "Female", "male", "female", "M", "F", "Not specified"]
+    },
+    "patient_id": {
+        "type": "alphanumeric",
+        "format": _PATIENT_ID_RE
+    },
+    "scan_date": {
+        "type": "date",
+        "formats": ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"]
+    },
+    "cancer_types": [
+        "lung", "breast", "colon", "prostate", "liver", "pancreatic",
+        "gastric", "esophageal", "ovarian", "cervical", "kidney", "bladder",
+        "head and neck", "melanoma", "lymphoma", "leukemia", "sarcoma",
+        "adenocarcinoma", "carcinoma", "squamous cell carcinoma"
+    ],
+    "tumor_size": {
+        "type": "measurement",
+        "format": _TUMOR_SIZE_RE,
+        "max_cm": 50
+    },
+    "suv_values": {
+        "type": "numeric",
+        "min": 0.0,
+        "max": 50.0,
+        "format": _SUV_RE
+    },
+    "tnm_staging": {
+        "t_stages": ["T0", "Tis", "T1", "T1a", "T1b", "T1c", "T2", "T2a", "T2b", "T3", "T4", "T4a", "T4b", "Tx"],
+        "n_stages": ["N0", "N1", "N1a", "N1b", "N1c", "N2", "N2a", "N2b", "N2c", "N3", "Nx"],
+        "m_stages": ["M0", "M1", "M1a", "M1b", "M1c", "Mx"],
+        "overall_stages": [
+            "Stage 0", "Stage I", "Stage IA", "Stage IB", 
+            "Stage II", "Stage IIA", "Stage IIB", "Stage IIC",
+            "Stage III", "Stage IIIA", "Stage IIIB", "Stage IIIC",
+            "Stage IV", "Stage IVA", "Stage IVB", "Stage IVC"
+        ]
+    }
+}
+
+# Hashable copy of the gender options for membership checks (the list keeps display order)
+_GENDER_OPTIONS = frozenset(_VALIDATION_RULES["gender"]["options"])
+
+
+class _TermTrie:
+    """Pure-Python stand-in for an Aho-Corasick automaton over a few short terms."""
+    
+    def __init__(self):
+        self._root = {}
+    
+    def add_word(self, word: str, value: Any):
+        node = self._root
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[None] = value  # None marks the end of a term
+    
+    def iter(self, text: str):
+        """Yield (end_index, value) for every stored term occurring in text."""
+        root = self._root
+        for start in range(len(text)):
+            node = root
+            for end in range(start, len(text)):
+                node = node.get(text[end])
+                if node is None:
+                    break
+                if None in node:
+                    yield end, node[None]
+
+
+class CancerTermMatcher:
+    """
+    Finds cancer types related to an input in both directions, in list order:
+    types whose name occurs in the input, and types whose name contains it.
+    """
+    
+    def __init__(self, cancer_types: List[str]):
+        self._cancer_types = tuple(cancer_types)
+        lowered = [ct.lower() for ct in cancer_types]
+        
+        # Terms occurring in the input: one pass over the input with an automaton
+        if AHOCORASICK_AVAILABLE:
+            self._automaton = ahocorasick.Automaton()
+        else:
+            self._automaton = _TermTrie()
+        for index, ct_lower in enumerate(lowered):
+            self._automaton.add_word(ct_lower, index)
+        if AHOCORASICK_AVAILABLE:
+            self._automaton.make_automaton()
+        
+        # Terms containing the input: one substring search over all terms joined
+        self._joined = "\n".join(lowered)
+        self._starts = []
+        offset = 0
+        for ct_lower in lowered:
+            self._starts.append(offset)
+            offset += len(ct_lower) + 1
+    
+    def matches(self, value_lower: str) -> List[str]:
+        """Cancer types that occur in, or contain, the lowercased value."""
+        indices = {index for _, index in self._automaton.iter(value_lower)}
+        
+        if value_lower and "\n" not in value_lower:
+            position = self._joined.find(value_lower)
+            while position != -1:
+                indices.add(bisect_right(self._starts, position) - 1)
+                position = self._joined.find(value_lower, position + 1)
+        
+        return [self._cancer_types[index] for index in sorted(indices)]
+
 
 class DataValidator:
     """Advanced data validation for medical fields."""
     
     def __init__(self):
-        self.validation_rules = self._setup_validation_rules()
-    
-    def _setup_validation_rules(self) -> Dict[str, Any]:
-        """Setup comprehensive validation rules."""
-        return {
-            "age": {
-                "type": "numeric",
-                "min": 0,
-                "max": 120,
-                "format": r"^\d{1,3}$"
-            },
-            "gender": {
-                "type": "categorical",
-                "options": ["Male", "Female", "male", "female", "M", "F", "Not specified"]
-            },
-            "patient_id": {
-                "type": "alphanumeric",
-                "format": r"^[A-Za-z0-9\-_]{3,20}$"
-            },
-            "scan_date": {
-                "type": "date",
-                "formats": ["%Y-%m-%d", "%d/%m/%Y", "%m/%d/%Y", "%d-%m-%Y"]
-            },
-            "cancer_types": [
-                "lung", "breast", "colon", "prostate", "liver", "pancreatic",
-                "gastric", "esophageal", "ovarian", "cervical", "kidney", "bladder",
-                "head and neck", "melanoma", "lymphoma", "leukemia", "sarcoma",
-                "adenocarcinoma", "carcinoma", "squamous cell carcinoma"
-            ],
-            "tumor_size": {
-                "type": "measurement",
-                "format": r"^\d+(\.\d+)?(\s*x\s*\d+(\.\d+)?)*\s*(cm|mm)$",
-                "max_cm": 50
-            },
-            "suv_values": {
-                "type": "numeric",
-                "min": 0.0,
-                "max": 50.0,
-                "format": r"^\d+(\.\d+)?$"
-            },
-            "tnm_staging": {
-                "t_stages": ["T0", "Tis", "T1", "T1a", "T1b", "T1c", "T2", "T2a", "T2b", "T3", "T4", "T4a", "T4b", "Tx"],
-                "n_stages": ["N0", "N1", "N1a", "N1b", "N1c", "N2", "N2a", "N2b", "N2c", "N3", "Nx"],
-                "m_stages": ["M0", "M1", "M1a", "M1b", "M1c", "Mx"],
-                "overall_stages": [
-                    "Stage 0", "Stage I", "Stage IA", "Stage IB", 
-                    "Stage II", "Stage IIA", "Stage IIB", "Stage IIC",
-                    "Stage III", "Stage IIIA", "Stage IIIB", "Stage IIIC",
-                    "Stage IV", "Stage IVA", "Stage IVB", "Stage IVC"
-                ]
-            }
+        self.validation_rules = _VALIDATION_RULES
+        
+        # Cancer-type lookups, built once: exact membership and substring matching
+        cancer_types = self.validation_rules["cancer_types"]
+        self._cancer_types_lc = frozenset(ct.lower() for ct in cancer_types)
+        self.cancer_matcher = CancerTermMatcher(cancer_types)
+        
+        # Field name -> validator, so validate_field is one dict lookup
+        self._dispatch = {
+            "age": self._validate_age,
+            "gender": self._validate_gender,
+            "patient_id": self._validate_patient_id,
+            "scan_date": self._validate_date,
+            "cancer_type": self._validate_cancer_type,
+            "tumor_size_cm": self._validate_tumor_size,
+            "suv_max": self._validate_suv,
+            "tnm_details": self._validate_tnm
         }
+        
+        # Streamlit reruns re-validate the same unchanged inputs; rules never change,
+        # so results can be memoized per (field_name, value)
+        self._validate_cached = functools.lru_cache(maxsize=2048)(self._run_validator)
     
     def validate_field(self, field_name: str, value: str) -> Tuple[bool, str, float]:
         """
@@ -85,133 +211,184 @@ class DataValidator:
         Returns:
             Tuple of (is_valid, error_message, confidence_score)
         """
-        if not value or value.strip().lower() in ["not specified", "not available", ""]:
+        stripped = value.strip() if value else ""
+        if stripped.lower() in _EMPTY_VALUES:
             return True, "", 0.5  # Neutral confidence for empty values
         
-        value = value.strip()
-        
-        # Age validation
-        if field_name == "age":
-            try:
-                age_val = int(value)
-                rules = self.validation_rules["age"]
-                if rules["min"] <= age_val <= rules["max"]:
-                    return True, "", 0.9
-                else:
-                    return False, f"Age should be between {rules['min']} and {rules['max']}", 0.3
-            except ValueError:
-                return False, "Age must be a number", 0.2
+        return self._validate_cached(field_name, stripped)
+    
+    def validate_many(self, field_values: Dict[str, str]) -> Dict[str, Tuple[bool, str, float]]:
+        """
+        Validate several fields at once.
         
-        # Gender validation
-        elif field_name == "gender":
-            options = self.validation_rules["gender"]["options"]
-            if value in options:
+        Args:
+            field_values: Mapping of field name to value
+            
+        Returns:
+            Mapping of field name to (is_valid, error_message, confidence_score)
+        """
+        return {field_name: self.validate_field(field_name, value) for field_name, value in field_values.items()}
+    
+    def validate_stripped(self, field_name: str, value: str) -> Tuple[bool, str, float]:
+        """validate_field for a value the caller has already stripped and checked to be non-empty."""
+        return self._validate_cached(field_name, value)
+    
+    def is_free_text(self, field_name: str) -> bool:
+        """Whether the field has no specific rule and is validated as plain text."""
+        return field_name not in self._dispatch
+    
+    def _run_validator(self, field_name: str, value: str) -> Tuple[bool, str, float]:
+        """Run the field's validator on a stripped, non-empty value."""
+        handler = self._dispatch.get(field_name, self._validate_text)
+        return handler(value)
+    
+    def _validate_age(self, value: str) -> Tuple[bool, str, float]:
+        """Age validation."""
+        try:
+            age_val = int(value)
+            rules = self.validation_rules["age"]
+            if rules["min"] <= age_val <= rules["max"]:
                 return True, "", 0.9
             else:
-                return False, f"Gender should be one of: {', '.join(options[:4])}", 0.4
-        
-        # Patient ID validation
-        elif field_name == "patient_id":
-            pattern = self.validation_rules["patient_id"]["format"]
-            if re.match(pattern, value):
+                return False, f"Age should be between {rules['min']} and {rules['max']}", 0.3
+        except ValueError:
+            return False, "Age must be a number", 0.2
+    
+    def _validate_gender(self, value: str) -> Tuple[bool, str, float]:
+        """Gender validation."""
+        if value in _GENDER_OPTIONS:
+            return True, "", 0.9
+        else:
+            options = self.validation_rules["gender"]["options"]
+            return False, f"Gender should be one of: {', '.join(options[:4])}", 0.4
+    
+    def _validate_patient_id(self, value: str) -> Tuple[bool, str, float]:
+        """Patient ID validation."""
+        if self.validation_rules["patient_id"]["format"].match(value):
+            return True, "", 0.9
+        else:
+            return False, "Patient ID should be 3-20 alphanumeric characters", 0.3
+    
+    def _validate_date(self, value: str) -> Tuple[bool, str, float]:
+        """Date validation."""
+        # Fast path for the preferred YYYY-MM-DD form; the length and dash checks keep
+        # fromisoformat from accepting the wider ISO 8601 forms it allows on Python 3.11+
+        if len(value) == 10 and value[4] == "-" and value[7] == "-":
+            try:
+                date.fromisoformat(value)
                 return True, "", 0.9
-            else:
-                return False, "Patient ID should be 3-20 alphanumeric characters", 0.3
+            except ValueError:
+                pass
         
-        # Date validation
-        elif field_name == "scan_date":
-            for date_format in self.validation_rules["scan_date"]["formats"]:
+        # One regex picks out the components; date() checks ranges without strptime's format parsing
+        match = _DATE_RE.match(value)
+        if match:
+            if match.group(1):
+                candidates = [(match.group(1), match.group(2), match.group(3))]
+            else:
+                first, separator, second, year = match.group(4, 5, 6, 7)
+                candidates = [(year, second, first)]  # Day first
+                if separator == "/":
+                    candidates.append((year, first, second))  # Month first
+            
+            for year, month, day in candidates:
                 try:
-                    datetime.strptime(value, date_format)
+                    date(int(year), int(month), int(day))
                     return True, "", 0.9
                 except ValueError:
                     continue
-            return False, "Date format should be YYYY-MM-DD, DD/MM/YYYY, or MM/DD/YYYY", 0.3
         
-        # Cancer type validation
-        elif field_name == "cancer_type":
-            cancer_types = self.validation_rules["cancer_types"]
-            value_lower = value.lower()
-            
-            # Exact match
-            if value_lower in [ct.lower() for ct in cancer_types]:
-                return True, "", 0.9
-            
-            # Partial match
-            matches = [ct for ct in cancer_types if ct.lower() in value_lower or value_lower in ct.lower()]
-            if matches:
-                return True, f"Similar to: {', '.join(matches[:3])}", 0.7
-            
-            # Check for common patterns
-            if any(term in value_lower for term in ["cancer", "carcinoma", "adenocarcinoma", "sarcoma"]):
-                return True, "Contains cancer terminology", 0.6
+        return False, "Date format should be YYYY-MM-DD, DD/MM/YYYY, or MM/DD/YYYY", 0.3
+    
+    def _validate_cancer_type(self, value: str) -> Tuple[bool, str, float]:
+        """Cancer type validation."""
+        value_lower = value.lower()
+        
+        # Exact match
+        if value_lower in self._cancer_types_lc:
+            return True, "", 0.9
+        
+        # Partial match
+        matches = self.cancer_matcher.matches(value_lower)
+        if matches:
+            return True, f"Similar to: {', '.join(matches[:3])}", 0.7
+        
+        # Check for common patterns
+        if _CANCER_TERM_RE.search(value):
+            return True, "Contains cancer terminology", 0.6
+        
+        return False, "Cancer type not recognized", 0.3
+    
+    def _validate_tumor_size(self, value: str) -> Tuple[bool, str, float]:
+        """Tumor size validation."""
+        rules = self.validation_rules["tumor_size"]
+        if rules["format"].match(value):
+            # Largest dimension for the range check; the format match guarantees at least one number
+            max_size = max(float(match.group(1)) for match in _NUM_RE.finditer(value))
             
-            return False, "Cancer type not recognized", 0.3
-        
-        # Tumor size validation
-        elif field_name == "tumor_size_cm":
-            rules = self.validation_rules["tumor_size"]
-            if re.match(rules["format"], value):
-                # Extract numeric value for range check
-                numbers = re.findall(r'\d+(\.\d+)?', value)
-                if numbers:
-                    max_size = max(float(num[0]) if num[0] else float(num) for num in numbers)
-                    unit = "mm" if "mm" in value.lower() else "cm"
-                    
-                    if unit == "mm":
-                        max_size = max_size / 10  # Convert to cm
-                    
-                    if max_size <= rules["max_cm"]:
-                        return True, "", 0.9
-                    else:
-                        return False, f"Tumor size seems unusually large (>{rules['max_cm']}cm)", 0.4
+            # The format regex is case-sensitive, so the unit is already lowercase
+            if value.endswith("mm"):
+                max_size = max_size / 10  # Convert to cm
             
-            return False, "Tumor size format should be like '3.2 cm' or '2.1 x 1.8 cm'", 0.3
-        
-        # SUV validation
-        elif field_name == "suv_max":
-            try:
-                suv_val = float(value)
-                rules = self.validation_rules["suv_values"]
-                if rules["min"] <= suv_val <= rules["max"]:
-                    return True, "", 0.9
-                else:
-                    return False, f"SUV value should be between {rules['min']} and {rules['max']}", 0.3
-            except ValueError:
-                return False, "SUV value must be a number", 0.2
-        
-        # TNM staging validation
-        elif field_name in ["tnm_details"]:
-            # Check for TNM pattern
-            tnm_pattern = r'[cCpP]?[TtNnMm][0-4][a-c]?(?:is)?'
-            if re.search(tnm_pattern, value):
-                return True, "", 0.8
+            if max_size <= rules["max_cm"]:
+                return True, "", 0.9
             else:
-                return False, "TNM staging format not recognized (e.g., T2N1M0)", 0.3
+                return False, f"Tumor size seems unusually large (>{rules['max_cm']}cm)", 0.4
         
-        # Default validation for text fields
-        else:
-            if len(value) > 1000:
-                return False, "Text too long (>1000 characters)", 0.3
-            elif len(value) < 2:
-                return False, "Text too short", 0.4
+        return False, "Tumor size format should be like '3.2 cm' or '2.1 x 1.8 cm'", 0.3
+    
+    def _validate_suv(self, value: str) -> Tuple[bool, str, float]:
+        """SUV validation."""
+        try:
+            suv_val = float(value)
+            rules = self.validation_rules["suv_values"]
+            if rules["min"] <= suv_val <= rules["max"]:
+                return True, "", 0.9
             else:
-                return True, "", 0.7
+                return False, f"SUV value should be between {rules['min']} and {rules['max']}", 0.3
+        except ValueError:
+            return False, "SUV value must be a number", 0.2
+    
+    def _validate_tnm(self, value: str) -> Tuple[bool, str, float]:
+        """TNM staging validation."""
+        # Check for TNM pattern
+        if _TNM_RE.search(value):
+            return True, "", 0.8
+        else:
+            return False, "TNM staging format not recognized (e.g., T2N1M0)", 0.3
+    
+    def _validate_text(self, value: str) -> Tuple[bool, str, float]:
+        """Default validation for text fields."""
+        if len(value) > 1000:
+            return False, "Text too long (>1000 characters)", 0.3
+        elif len(value) < 2:
+            return False, "Text too short", 0.4
+        else:
+            return True, "", 0.7
+
+
+@st.cache_resource(show_spinner=False)
+def _get_validator() -> DataValidator:
+    """Shared validator: building one sets up the cancer-type matcher and dispatch table."""
+    return DataValidator()
 
 
 class ConfidenceScorer:
     """Calculate confidence scores for extracted data."""
     
-    def __init__(self):
-        self.validator = DataValidator()
+    CRITICAL_FIELDS = ["cancer_type", "tumor_location", "tumor_size_cm", "suv_max", "tnm_details"]
+    
+    def __init__(self, validator: Optional[DataValidator] = None):
+        self.validator = validator or _get_validator()
     
     def calculate_field_confidence(self, field_name: str, value: str, context: str = "") -> float:
         """Calculate confidence score for a field."""
-        if not value or value.strip().lower() in ["not specified", "not available", ""]:
+        stripped = value.strip() if value else ""
+        if stripped.lower() in _EMPTY_VALUES:
             return 0.0
         
         # Base validation confidence
-        is_valid, _, base_confidence = self.validator.validate_field(field_name, value)
+        is_valid, _, base_confidence = self.validator.validate_stripped(field_name, stripped)
         
         # Context-based adjustments
         context_bonus = self._analyze_context(field_name, value, context)
@@ -229,30 +406,21 @@ class ConfidenceScorer:
         if not context:
             return 0.0
         
-        context_lower = context.lower()
-        value_lower = value.lower()
-        
         # Look for supporting context
-        if field_name == "cancer_type":
-            if any(term in context_lower for term in ["diagnosis", "primary", "histology"]):
-                return 0.1
-        elif field_name == "suv_max":
-            if any(term in context_lower for term in ["suv", "uptake", "fdg"]):
-                return 0.1
-        elif field_name == "tumor_size_cm":
-            if any(term in context_lower for term in ["size", "measure", "dimension"]):
-                return 0.1
+        context_re = _CONTEXT_RES.get(field_name)
+        if context_re is not None and context_re.search(context):
+            return 0.1
         
         return 0.0
     
     def _analyze_format(self, field_name: str, value: str) -> float:
         """Analyze format quality for confidence adjustment."""
         # Specific format patterns increase confidence
-        if field_name == "suv_max" and re.match(r'^\d+\.\d+$', value):
+        if field_name == "suv_max" and _SUV_FORMAT_RE.match(value):
             return 0.05
-        elif field_name == "tumor_size_cm" and re.search(r'\d+\.\d+', value):
+        elif field_name == "tumor_size_cm" and _DECIMAL_RE.search(value):
             return 0.05
-        elif field_name == "tnm_details" and re.search(r'T\d+N\d+M\d+', value):
+        elif field_name == "tnm_details" and _TNM_FULL_RE.search(value):
             return 0.1
         
         return 0.0
@@ -260,7 +428,7 @@ class ConfidenceScorer:
     def calculate_overall_confidence(self, extraction_result: ExtractionResult) -> Dict[str, float]:
         """Calculate comprehensive confidence metrics."""
         field_confidences = {}
-        critical_fields = ["cancer_type", "tumor_location", "tumor_size_cm", "suv_max", "tnm_details"]
+        critical_fields = self.CRITICAL_FIELDS
         
         # Calculate individual field confidences
         for field_name in critical_fields:
@@ -268,32 +436,107 @@ class ConfidenceScorer:
             confidence = self.calculate_field_confidence(field_name, value)
             field_confidences[field_name] = confidence
         
-        # Calculate aggregate metrics
-        valid_confidences = [conf for conf in field_confidences.values() if conf > 0]
+        # Calculate aggregate metrics in a single pass
+        total = valid_sum = 0.0
+        valid_count = high_count = low_count = 0
+        for conf in field_confidences.values():
+            total += conf
+            if conf > 0:
+                valid_sum += conf
+                valid_count += 1
+                if conf > 0.8:
+                    high_count += 1
+                elif conf < 0.5:
+                    low_count += 1
         
         return {
             "field_confidences": field_confidences,
-            "average_confidence": sum(valid_confidences) / len(valid_confidences) if valid_confidences else 0.0,
-            "critical_fields_confidence": sum(field_confidences.values()) / len(critical_fields),
-            "high_confidence_fields": len([conf for conf in field_confidences.values() if conf > 0.8]),
-            "low_confidence_fields": len([conf for conf in field_confidences.values() if 0 < conf < 0.5])
+            "average_confidence": valid_sum / valid_count if valid_count else 0.0,
+            "critical_fields_confidence": total / len(critical_fields),
+            "high_confidence_fields": high_count,
+            "low_confidence_fields": low_count
         }
+    
+    def score_batch(self, results: List[ExtractionResult]) -> pd.DataFrame:
+        """
+        Score many extraction results at once, column by column.
+        
+        Args:
+            results: Extraction results to score
+            
+        Returns:
+            DataFrame with one row per result: a confidence column per critical field plus
+            the aggregate metrics of calculate_overall_confidence
+        """
+        fields = self.CRITICAL_FIELDS
+        raw = pd.DataFrame(
+            [{field: getattr(result, field, "") or "" for field in fields} for result in results],
+            columns=fields
+        )
+        
+        scores = pd.DataFrame(index=raw.index)
+        for field in fields:
+            scores[field] = self._score_column(field, raw[field].astype(str))
+        
+        field_scores = scores[fields]
+        has_value = field_scores > 0
+        scores["average_confidence"] = field_scores.where(has_value).mean(axis=1).fillna(0.0)
+        scores["critical_fields_confidence"] = field_scores.mean(axis=1)
+        scores["high_confidence_fields"] = (field_scores > 0.8).sum(axis=1)
+        scores["low_confidence_fields"] = (has_value & (field_scores < 0.5)).sum(axis=1)
+        
+        return scores
+    
+    def _score_column(self, field_name: str, values: pd.Series) -> pd.Series:
+        """Field confidences for a column of values (no context), matching calculate_field_confidence."""
+        stripped = values.str.strip()
+        empty = stripped.str.lower().isin(_EMPTY_VALUES)
+        
+        # Regex and length rules vectorize directly; format bonuses see the raw value
+        if field_name == "tnm_details":
+            base = stripped.str.contains(_TNM_RE).map({True: 0.8, False: 0.3})
+            confidence = base + values.str.contains(_TNM_FULL_RE) * 0.1
+        elif self.validator.is_free_text(field_name):
+            lengths = stripped.str.len()
+            confidence = pd.Series(0.7, index=values.index).mask(lengths < 2, 0.4).mask(lengths > 1000, 0.3)
+        else:
+            # Python-level rules (cancer terms, units, numeric ranges): score each distinct value once
+            unique_scores = {value: self.calculate_field_confidence(field_name, value) for value in values.unique()}
+            confidence = values.map(unique_scores)
+        
+        return confidence.clip(upper=1.0).mask(empty, 0.0)
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _cached_overall_confidence(field_values: Tuple[Tuple[str, str], ...]) -> Dict[str, Any]:
+    """Overall confidence for the critical (field, value) pairs, reused across reruns."""
+    return ConfidenceScorer().calculate_overall_confidence(ExtractionResult(**dict(field_values)))
 
 
 class InteractiveEditor:
     """Interactive editor for medical data with real-time validation."""
     
+    GENDER_OPTIONS = ["Not specified", "Male", "Female", "male", "female", "M", "F"]
+    PRESENCE_OPTIONS = ["Not specified", "Yes", "No"]
+    
+    # Option -> position maps, so selectbox defaults are a dict lookup
+    _GENDER_INDEX = {option: i for i, option in enumerate(GENDER_OPTIONS)}
+    _PRESENCE_INDEX = {option: i for i, option in enumerate(PRESENCE_OPTIONS)}
+    
     def __init__(self):
-        self.validator = DataValidator()
-        self.confidence_scorer = ConfidenceScorer()
+        self.validator = _get_validator()
+        self.confidence_scorer = ConfidenceScorer(self.validator)
     
     def render_editor_interface(self, extraction_result: ExtractionResult) -> ExtractionResult:
         """Render interactive editing interface with validation."""
         st.header("✏️ Module 3: Data Verification & Correction")
         st.markdown("Review and correct extracted information. Fields with low confidence are highlighted.")
         
-        # Calculate confidence scores
-        confidence_metrics = self.confidence_scorer.calculate_overall_confidence(extraction_result)
+        # Calculate confidence scores (cached: the extraction rarely changes between reruns)
+        field_values = tuple(
+            (field, getattr(extraction_result, field, "")) for field in ConfidenceScorer.CRITICAL_FIELDS
+        )
+        confidence_metrics = _cached_overall_confidence(field_values)
         
         # Display confidence summary
         self._display_confidence_summary(confidence_metrics)
@@ -385,11 +628,11 @@ class InteractiveEditor:
         with col2:
             # Gender
             confidence = confidence_metrics["field_confidences"].get("gender", 0.5)
-            gender_options = ["Not specified", "Male", "Female", "male", "female", "M", "F"]
             edited.gender = self._render_validated_selectbox(
                 "Gender",
                 original.gender,
-                gender_options,
+                self.GENDER_OPTIONS,
+                self._GENDER_INDEX,
                 confidence,
                 help_text="Patient gender"
             )
@@ -502,10 +745,10 @@ class InteractiveEditor:
         with col1:
             ln_present = st.selectbox(
                 "Lymph nodes involved?",
-                ["Not specified", "Yes", "No"],
+                self.PRESENCE_OPTIONS,
                 index=self._get_selectbox_index(
                     original.lymph_node_involvement.get("present", ""), 
-                    ["Not specified", "Yes", "No"]
+                    self._PRESENCE_INDEX
                 )
             )
         
@@ -528,10 +771,10 @@ class InteractiveEditor:
         with col1:
             met_present = st.selectbox(
                 "Distant metastasis present?",
-                ["Not specified", "Yes", "No"],
+                self.PRESENCE_OPTIONS,
                 index=self._get_selectbox_index(
                     original.distant_metastasis.get("present", ""),
-                    ["Not specified", "Yes", "No"]
+                    self._PRESENCE_INDEX
                 )
             )
         
@@ -594,7 +837,8 @@ class InteractiveEditor:
         return new_value
     
     def _render_validated_selectbox(self, label: str, value: str, options: List[str],
-                                   confidence: float, help_text: str = "") -> str:
+                                   option_index: Dict[str, int], confidence: float,
+                                   help_text: str = "") -> str:
         """Render selectbox with validation."""
         
         # Color coding
@@ -605,7 +849,7 @@ class InteractiveEditor:
         else:
             label_suffix = " 🔴"
         
-        index = self._get_selectbox_index(value, options)
+        index = self._get_selectbox_index(value, option_index)
         
         return st.selectbox(
             f"{label}{label_suffix}",
@@ -614,36 +858,25 @@ class InteractiveEditor:
             help=f"{help_text} (Confidence: {confidence:.1%})"
         )
     
-    def _get_selectbox_index(self, value: str, options: List[str]) -> int:
-        """Get index for selectbox."""
-        try:
-            return options.index(value) if value in options else 0
-        except:
-            return 0
+    def _get_selectbox_index(self, value: str, option_index: Dict[str, int]) -> int:
+        """Get index for selectbox from an option -> position map (first option if absent)."""
+        return option_index.get(value, 0)
     
     def _get_cancer_type_suggestions(self, input_value: str) -> List[str]:
         """Get cancer type suggestions."""
-        cancer_types = self.validator.validation_rules["cancer_types"]
-        input_lower = input_value.lower()
-        
-        suggestions = []
-        for cancer_type in cancer_types:
-            if input_lower in cancer_type.lower() or cancer_type.lower() in input_lower:
-                suggestions.append(cancer_type)
-        
-        return suggestions[:5]  # Limit to 5 suggestions
+        return self.validator.cancer_matcher.matches(input_value.lower())[:5]  # Limit to 5 suggestions
     
     def _display_validation_summary(self, edited_result: ExtractionResult):
         """Display final validation summary."""
         st.subheader("✅ Validation Summary")
         
         # Validate all fields
-        validation_results = {}
-        critical_fields = ["cancer_type", "tumor_location", "tumor_size_cm", "suv_max", "tnm_details"]
+        critical_fields = ConfidenceScorer.CRITICAL_FIELDS
+        field_values = {field: getattr(edited_result, field, "") for field in critical_fields}
         
-        for field in critical_fields:
-            value = getattr(edited_result, field, "")
-            is_valid, error_msg, confidence = self.validator.validate_field(field, value)
+        validation_results = {}
+        for field, (is_valid, error_msg, confidence) in self.validator.validate_many(field_values).items():
+            value = field_values[field]
             validation_results[field] = {
                 "valid": is_valid,
                 "error": error_msg,
@@ -703,7 +936,7 @@ class VerificationModuleUI:
         
         with col2:
             if st.button("📄 Export JSON"):
-                json_data = json.dumps(edited_result.to_dict(), indent=2, default=str)
+                json_data = json_export_bytes(edited_result.to_dict())
                 st.download_button(
                     "Download JSON",
                     data=json_data,
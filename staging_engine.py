@@ -4,10 +4,14 @@ Implements TNM staging algorithms with cancer-specific stagers.
 """
 
 import logging
-from typing import Dict, Any, Optional
-from dataclasses import dataclass, asdict
+import sys
+from bisect import bisect_left
+from types import MappingProxyType
+from typing import Callable, Dict, Any, Mapping, Optional, Sequence, Tuple
+from dataclasses import dataclass, field, replace
+from functools import lru_cache
 from abc import ABC, abstractmethod
-import streamlit as st
+import numpy as np
 
 from config import ERROR_MESSAGES
 from exceptions import StagingError, OncoStagingError
@@ -15,8 +19,14 @@ from feature_extractor import MedicalFeatures
 
 logger = logging.getLogger(__name__)
 
+# Drop the per-instance __dict__ from TNMStaging where supported (3.10+)
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
 
-@dataclass
+_M_CODES = ("M0", "M1")
+_M_ARRAY = np.array(_M_CODES)
+
+
+@dataclass(frozen=True, **_DATACLASS_SLOTS)
 class TNMStaging:
     """Data class for TNM staging results."""
     T: str = "Tx"
@@ -25,21 +35,76 @@ class TNMStaging:
     stage: str = "Unknown"
     substage: str = ""
     description: str = ""
+    _full_stage: str = field(init=False, repr=False, compare=False)
+    
+    def __post_init__(self):
+        # Frozen, so the stage/substage concatenation can be done once
+        object.__setattr__(self, "_full_stage", f"{self.stage}{self.substage}")
     
     def to_dict(self) -> Dict[str, str]:
         """Convert to dictionary."""
-        return asdict(self)
+        return {
+            "T": self.T,
+            "N": self.N,
+            "M": self.M,
+            "stage": self.stage,
+            "substage": self.substage,
+            "description": self.description
+        }
     
     def get_full_stage(self) -> str:
         """Get full stage with substage."""
-        if self.substage:
-            return f"{self.stage}{self.substage}"
-        return self.stage
+        return self._full_stage
 
 
 class CancerStager(ABC):
     """Abstract base class for cancer-specific staging."""
     
+    _T_CODES: Tuple[str, ...]
+    _N_CODES: Tuple[str, ...]
+    _STAGE_TABLE: Dict[Tuple[int, int, int], Tuple[str, str]]
+    
+    def __init__(self):
+        """Build the shared staging result for every (T, N, M) combination."""
+        self._results: Dict[Tuple[int, int, int], TNMStaging] = {}
+        for (t_idx, n_idx, m_idx), (stage, substage) in self._STAGE_TABLE.items():
+            staging = TNMStaging(
+                T=self._T_CODES[t_idx],
+                N=self._N_CODES[n_idx],
+                M=_M_CODES[m_idx],
+                stage=stage,
+                substage=substage
+            )
+            self._results[(t_idx, n_idx, m_idx)] = replace(
+                staging, description=self.get_stage_description(staging)
+            )
+        
+        # The same results as contiguous (T, N, M) arrays for batch staging
+        self._t_array = np.array(self._T_CODES)
+        self._n_array = np.array(self._N_CODES)
+        self._stage_lut = np.array([
+            [
+                [self._results[(t_idx, n_idx, m_idx)].get_full_stage()
+                 for m_idx in range(len(_M_CODES))]
+                for n_idx in range(len(self._N_CODES))
+            ]
+            for t_idx in range(len(self._T_CODES))
+        ])
+    
+    def _lookup_batch(
+        self,
+        t_idx: np.ndarray,
+        n_idx: np.ndarray,
+        m_idx: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Map T, N and M index arrays to code and full-stage arrays."""
+        return (
+            self._t_array[t_idx],
+            self._n_array[n_idx],
+            _M_ARRAY[m_idx],
+            self._stage_lut[t_idx, n_idx, m_idx]
+        )
+    
     @abstractmethod
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for specific cancer type."""
@@ -51,383 +116,487 @@ class CancerStager(ABC):
         pass
 
 
+# Stage grouping rules: (T codes, N codes, M codes, stage, substage), where
+# _ANY matches every code. The first matching rule wins, and each rule set
+# ends with a catch-all so every (T, N, M) combination resolves.
+_ANY = None
+_StageRule = Tuple[Optional[Tuple[str, ...]], Optional[Tuple[str, ...]],
+                   Optional[Tuple[str, ...]], str, str]
+
+_GALLBLADDER_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", "B"),
+    (("T3",), ("Nx", "N1", "N2"), _ANY, "Stage IV", "A"),
+    (("T3",), _ANY, _ANY, "Stage III", "B"),
+    (("T2",), ("N0",), _ANY, "Stage II", ""),
+    (("T1", "T2"), ("Nx", "N1", "N2"), _ANY, "Stage III", "A"),
+    (("T1",), ("N0",), _ANY, "Stage I", ""),
+    (_ANY, _ANY, _ANY, "Stage Unknown", ""),
+)
+
+_ESOPHAGEAL_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", "B"),
+    (("T4",), _ANY, _ANY, "Stage IV", "A"),
+    (_ANY, ("N3",), _ANY, "Stage IV", "A"),
+    (("T2", "T3"), ("N0", "N1"), _ANY, "Stage II", ""),
+    (("T1",), ("N0",), _ANY, "Stage I", ""),
+    (_ANY, _ANY, _ANY, "Stage III", ""),
+)
+
+_BREAST_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", ""),
+    (("T1",), ("N0",), _ANY, "Stage I", ""),
+    (("T1", "T2"), ("N1",), _ANY, "Stage II", ""),
+    (("T3",), _ANY, _ANY, "Stage III", ""),
+    (_ANY, ("N2", "N3"), _ANY, "Stage III", ""),
+    (_ANY, _ANY, _ANY, "Stage Unknown", ""),
+)
+
+_LUNG_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", ""),
+    (("T1",), ("N0",), _ANY, "Stage I", ""),
+    (("T2", "T3"), ("N0", "N1"), _ANY, "Stage II", ""),
+    (("T3", "T4"), _ANY, _ANY, "Stage III", ""),
+    (_ANY, ("N2",), _ANY, "Stage III", ""),
+    (_ANY, _ANY, _ANY, "Stage Unknown", ""),
+)
+
+_COLORECTAL_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", ""),
+    (("T1", "T2"), ("N0",), _ANY, "Stage I", ""),
+    (("T3",), ("N0",), _ANY, "Stage II", ""),
+    (_ANY, ("N1", "N2"), _ANY, "Stage III", ""),
+    (_ANY, _ANY, _ANY, "Stage Unknown", ""),
+)
+
+_HEAD_NECK_RULES: Tuple[_StageRule, ...] = (
+    (_ANY, _ANY, ("M1",), "Stage IV", "C"),
+    (("T1",), ("N0",), _ANY, "Stage I", ""),
+    (("T1", "T2"), ("N1", "N2"), _ANY, "Stage III", ""),
+    (("T3",), _ANY, _ANY, "Stage IV", "A"),
+    (_ANY, ("N3",), _ANY, "Stage IV", "A"),
+    (_ANY, _ANY, _ANY, "Stage II", ""),
+)
+
+
+def _resolve_stage(rules: Tuple[_StageRule, ...], t: str, n: str, m: str) -> Tuple[str, str]:
+    """Return (stage, substage) from the first rule matching the TNM codes."""
+    for t_codes, n_codes, m_codes, stage, substage in rules:
+        if ((t_codes is _ANY or t in t_codes)
+                and (n_codes is _ANY or n in n_codes)
+                and (m_codes is _ANY or m in m_codes)):
+            return stage, substage
+    raise ValueError(f"No staging rule matches {t} {n} {m}")
+
+
+def _build_stage_table(
+    t_codes: Tuple[str, ...],
+    n_codes: Tuple[str, ...],
+    rules: Tuple[_StageRule, ...]
+) -> Dict[Tuple[int, int, int], Tuple[str, str]]:
+    """Enumerate every (T, N, M) index triple into a (stage, substage) table."""
+    return {
+        (t_idx, n_idx, m_idx): _resolve_stage(rules, t_code, n_code, m_code)
+        for t_idx, t_code in enumerate(t_codes)
+        for n_idx, n_code in enumerate(n_codes)
+        for m_idx, m_code in enumerate(_M_CODES)
+    }
+
+
 class GallbladderCancerStager(CancerStager):
     """Staging logic for gallbladder cancer."""
     
+    # Tumor size > 0 cm is T1, > 2 cm is T2; liver invasion forces T3
+    _T_THRESHOLDS = (0.0, 2.0)
+    _T_CODES = ("Tx", "T1", "T2", "T3")
+    _T_LIVER_INVASION = 3
+    # Node counts: negative is Nx, 0 is N0, 1-3 is N1, more is N2
+    _N_THRESHOLDS = (-1, 0, 3)
+    _N_CODES = ("Nx", "N0", "N1", "N2")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _GALLBLADDER_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Early stage cancer confined to gallbladder wall",
+        "Stage II": "Tumor has reached outer layer of gallbladder",
+        "Stage IIIA": "Tumor has spread to nearby lymph nodes",
+        "Stage IIIB": "Tumor has invaded liver or nearby organs",
+        "Stage IVA": "Tumor has spread to major blood vessels or multiple organs",
+        "Stage IVB": "Advanced cancer with distant metastasis"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for gallbladder cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage
         if features.liver_invasion:
-            staging.T = "T3"
-        elif features.tumor_size_cm > 2:
-            staging.T = "T2"
-        elif features.tumor_size_cm > 0:
-            staging.T = "T1"
-        else:
-            staging.T = "Tx"
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif 1 <= features.lymph_nodes_involved <= 3:
-            staging.N = "N1"
-        elif features.lymph_nodes_involved > 3:
-            staging.N = "N2"
-        else:
-            staging.N = "Nx"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-            staging.substage = "B"
-        elif staging.T == "T3" and staging.N != "N0":
-            staging.stage = "Stage IV"
-            staging.substage = "A"
-        elif staging.T == "T3":
-            staging.stage = "Stage III"
-            staging.substage = "B"
-        elif staging.T == "T2" and staging.N == "N0":
-            staging.stage = "Stage II"
-        elif staging.T in ["T1", "T2"] and staging.N != "N0":
-            staging.stage = "Stage III"
-            staging.substage = "A"
-        elif staging.T == "T1" and staging.N == "N0":
-            staging.stage = "Stage I"
+            t_idx = self._T_LIVER_INVASION
         else:
-            staging.stage = "Stage Unknown"
+            t_idx = bisect_left(self._T_THRESHOLDS, features.tumor_size_cm)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        sizes: np.ndarray,
+        nodes: np.ndarray,
+        liver: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many gallbladder cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            sizes: Tumor sizes in cm
+            nodes: Involved lymph node counts
+            liver: Liver invasion flags
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.where(
+            np.asarray(liver, dtype=bool),
+            self._T_LIVER_INVASION,
+            np.searchsorted(self._T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+        )
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for gallbladder cancer staging."""
-        descriptions = {
-            "Stage I": "Early stage cancer confined to gallbladder wall",
-            "Stage II": "Tumor has reached outer layer of gallbladder",
-            "Stage IIIA": "Tumor has spread to nearby lymph nodes",
-            "Stage IIIB": "Tumor has invaded liver or nearby organs",
-            "Stage IVA": "Tumor has spread to major blood vessels or multiple organs",
-            "Stage IVB": "Advanced cancer with distant metastasis"
-        }
-        
-        full_stage = staging.get_full_stage()
-        return descriptions.get(full_stage, "Staging information not available")
+        return self._DESCRIPTIONS.get(staging.get_full_stage(), "Staging information not available")
 
 
 class EsophagealCancerStager(CancerStager):
     """Staging logic for esophageal cancer."""
     
+    _T_CODES = ("Tx", "T1a", "T1b", "T2", "T3", "T4")
+    # Tumor depth keyword to index into _T_CODES; unknown depth is Tx
+    _DEPTH_TO_T = MappingProxyType({
+        "mucosa": 1,
+        "submucosa": 2,
+        "muscularis": 3,
+        "adventitia": 4,
+        "adjacent structures": 5
+    })
+    # Node counts: negative is Nx, 0 is N0, 1-2 is N1, 3-6 is N2, more is N3
+    _N_THRESHOLDS = (-1, 0, 2, 6)
+    _N_CODES = ("Nx", "N0", "N1", "N2", "N3")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _ESOPHAGEAL_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Early stage confined to inner layer of esophagus",
+        "Stage II": "Tumor has reached deeper layers of esophagus",
+        "Stage III": "Spread to nearby lymph nodes",
+        "Stage IVA": "Invaded nearby organs",
+        "Stage IVB": "Metastasis to distant organs"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for esophageal cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage based on depth
-        depth_to_t = {
-            "mucosa": "T1a",
-            "submucosa": "T1b",
-            "muscularis": "T2",
-            "adventitia": "T3",
-            "adjacent structures": "T4"
-        }
-        
-        staging.T = depth_to_t.get(features.tumor_depth.lower(), "Tx")
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif 1 <= features.lymph_nodes_involved <= 2:
-            staging.N = "N1"
-        elif 3 <= features.lymph_nodes_involved <= 6:
-            staging.N = "N2"
-        elif features.lymph_nodes_involved > 6:
-            staging.N = "N3"
-        else:
-            staging.N = "Nx"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-            staging.substage = "B"
-        elif staging.T == "T4" or staging.N == "N3":
-            staging.stage = "Stage IV"
-            staging.substage = "A"
-        elif staging.T in ["T2", "T3"] and staging.N in ["N0", "N1"]:
-            staging.stage = "Stage II"
-        elif staging.T == "T1" and staging.N == "N0":
-            staging.stage = "Stage I"
-        else:
-            staging.stage = "Stage III"
+        t_idx = self._DEPTH_TO_T.get(features.tumor_depth, 0)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        depths: Sequence[str],
+        nodes: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many esophageal cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            depths: Lowercase tumor depth keywords
+            nodes: Involved lymph node counts
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.fromiter(
+            (self._DEPTH_TO_T.get(depth, 0) for depth in depths),
+            dtype=np.intp,
+            count=len(depths)
+        )
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for esophageal cancer staging."""
-        descriptions = {
-            "Stage I": "Early stage confined to inner layer of esophagus",
-            "Stage II": "Tumor has reached deeper layers of esophagus",
-            "Stage III": "Spread to nearby lymph nodes",
-            "Stage IVA": "Invaded nearby organs",
-            "Stage IVB": "Metastasis to distant organs"
-        }
-        
-        full_stage = staging.get_full_stage()
-        return descriptions.get(full_stage, staging.stage)
+        return self._DESCRIPTIONS.get(staging.get_full_stage(), staging.stage)
 
 
 class BreastCancerStager(CancerStager):
     """Staging logic for breast cancer."""
     
+    # Tumor size <= 2 cm is T1, <= 5 cm is T2, larger is T3
+    _T_THRESHOLDS = (2.0, 5.0)
+    _T_CODES = ("T1", "T2", "T3")
+    # Node counts: 0 is N0, 1-3 is N1, 4-9 is N2, more is N3
+    _N_THRESHOLDS = (0, 3, 9)
+    _N_CODES = ("N0", "N1", "N2", "N3")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _BREAST_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Early stage, small tumor, no lymph node spread",
+        "Stage II": "Moderate-sized tumor or limited lymph node involvement",
+        "Stage III": "Large tumor or extensive lymph node involvement",
+        "Stage IV": "Metastasis to distant organs"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for breast cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage
-        if features.tumor_size_cm <= 2:
-            staging.T = "T1"
-        elif features.tumor_size_cm <= 5:
-            staging.T = "T2"
-        elif features.tumor_size_cm > 5:
-            staging.T = "T3"
-        else:
-            staging.T = "Tx"
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif features.lymph_nodes_involved <= 3:
-            staging.N = "N1"
-        elif features.lymph_nodes_involved <= 9:
-            staging.N = "N2"
-        elif features.lymph_nodes_involved > 9:
-            staging.N = "N3"
-        else:
-            staging.N = "Nx"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-        elif staging.T == "T1" and staging.N == "N0":
-            staging.stage = "Stage I"
-        elif staging.T in ["T1", "T2"] and staging.N == "N1":
-            staging.stage = "Stage II"
-        elif staging.T == "T3" or staging.N in ["N2", "N3"]:
-            staging.stage = "Stage III"
-        else:
-            staging.stage = "Stage Unknown"
+        t_idx = bisect_left(self._T_THRESHOLDS, features.tumor_size_cm)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        sizes: np.ndarray,
+        nodes: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many breast cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            sizes: Tumor sizes in cm
+            nodes: Involved lymph node counts
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.searchsorted(self._T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for breast cancer staging."""
-        descriptions = {
-            "Stage I": "Early stage, small tumor, no lymph node spread",
-            "Stage II": "Moderate-sized tumor or limited lymph node involvement",
-            "Stage III": "Large tumor or extensive lymph node involvement",
-            "Stage IV": "Metastasis to distant organs"
-        }
-        
-        return descriptions.get(staging.stage, "Staging information not available")
+        return self._DESCRIPTIONS.get(staging.stage, "Staging information not available")
 
 
 class LungCancerStager(CancerStager):
     """Staging logic for lung cancer."""
     
+    # Tumor size <= 3 cm is T1, <= 5 cm is T2, <= 7 cm is T3, larger is T4
+    _T_THRESHOLDS = (3.0, 5.0, 7.0)
+    _T_CODES = ("T1", "T2", "T3", "T4")
+    # Node counts: 0 is N0, 1-3 is N1, more is N2
+    _N_THRESHOLDS = (0, 3)
+    _N_CODES = ("N0", "N1", "N2")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _LUNG_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Early stage confined to lung only",
+        "Stage II": "Large tumor or spread to nearby lymph nodes",
+        "Stage III": "Locally advanced, spread within chest",
+        "Stage IV": "Metastasis to distant organs"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for lung cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage
-        if features.tumor_size_cm <= 3:
-            staging.T = "T1"
-        elif features.tumor_size_cm <= 5:
-            staging.T = "T2"
-        elif features.tumor_size_cm <= 7:
-            staging.T = "T3"
-        else:
-            staging.T = "T4"
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif features.lymph_nodes_involved <= 3:
-            staging.N = "N1"
-        else:
-            staging.N = "N2"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-        elif staging.T == "T1" and staging.N == "N0":
-            staging.stage = "Stage I"
-        elif staging.T in ["T2", "T3"] and staging.N in ["N0", "N1"]:
-            staging.stage = "Stage II"
-        elif staging.T in ["T3", "T4"] or staging.N == "N2":
-            staging.stage = "Stage III"
-        else:
-            staging.stage = "Stage Unknown"
+        t_idx = bisect_left(self._T_THRESHOLDS, features.tumor_size_cm)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        sizes: np.ndarray,
+        nodes: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many lung cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            sizes: Tumor sizes in cm
+            nodes: Involved lymph node counts
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.searchsorted(self._T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for lung cancer staging."""
-        descriptions = {
-            "Stage I": "Early stage confined to lung only",
-            "Stage II": "Large tumor or spread to nearby lymph nodes",
-            "Stage III": "Locally advanced, spread within chest",
-            "Stage IV": "Metastasis to distant organs"
-        }
-        
-        return descriptions.get(staging.stage, "Staging information not available")
+        return self._DESCRIPTIONS.get(staging.stage, "Staging information not available")
 
 
 class ColorectalCancerStager(CancerStager):
     """Staging logic for colorectal cancer."""
     
+    _T_CODES = ("Tx", "T1", "T2", "T3", "T4a", "T4b")
+    # Tumor depth keyword to index into _T_CODES; unknown depth is Tx
+    _DEPTH_TO_T = MappingProxyType({
+        "submucosa": 1,
+        "muscularis propria": 2,
+        "subserosa": 3,
+        "peritoneum": 4,
+        "invasion": 5
+    })
+    # Node counts: 0 is N0, 1-3 is N1, more is N2
+    _N_THRESHOLDS = (0, 3)
+    _N_CODES = ("N0", "N1", "N2")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _COLORECTAL_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Early stage confined to bowel wall",
+        "Stage II": "Penetrated bowel wall but no lymph node spread",
+        "Stage III": "Spread to nearby lymph nodes",
+        "Stage IV": "Metastasis to distant organs"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for colorectal cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage based on depth
-        depth_to_t = {
-            "submucosa": "T1",
-            "muscularis propria": "T2",
-            "subserosa": "T3",
-            "peritoneum": "T4a",
-            "invasion": "T4b"
-        }
-        
-        staging.T = depth_to_t.get(features.tumor_depth.lower(), "Tx")
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif features.lymph_nodes_involved <= 3:
-            staging.N = "N1"
-        else:
-            staging.N = "N2"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-        elif staging.T in ["T1", "T2"] and staging.N == "N0":
-            staging.stage = "Stage I"
-        elif staging.T == "T3" and staging.N == "N0":
-            staging.stage = "Stage II"
-        elif staging.N in ["N1", "N2"]:
-            staging.stage = "Stage III"
-        else:
-            staging.stage = "Stage Unknown"
+        t_idx = self._DEPTH_TO_T.get(features.tumor_depth, 0)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        depths: Sequence[str],
+        nodes: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many colorectal cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            depths: Lowercase tumor depth keywords
+            nodes: Involved lymph node counts
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.fromiter(
+            (self._DEPTH_TO_T.get(depth, 0) for depth in depths),
+            dtype=np.intp,
+            count=len(depths)
+        )
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for colorectal cancer staging."""
-        descriptions = {
-            "Stage I": "Early stage confined to bowel wall",
-            "Stage II": "Penetrated bowel wall but no lymph node spread",
-            "Stage III": "Spread to nearby lymph nodes",
-            "Stage IV": "Metastasis to distant organs"
-        }
-        
-        return descriptions.get(staging.stage, "Staging information not available")
+        return self._DESCRIPTIONS.get(staging.stage, "Staging information not available")
 
 
 class HeadNeckCancerStager(CancerStager):
     """Staging logic for head and neck cancer."""
     
+    # Tumor size <= 2 cm is T1, <= 4 cm is T2, larger is T3
+    _T_THRESHOLDS = (2.0, 4.0)
+    _T_CODES = ("T1", "T2", "T3")
+    # Node counts: 0 is N0, 1 is N1, 2-3 is N2, more is N3
+    _N_THRESHOLDS = (0, 1, 3)
+    _N_CODES = ("N0", "N1", "N2", "N3")
+    _STAGE_TABLE = _build_stage_table(_T_CODES, _N_CODES, _HEAD_NECK_RULES)
+    _DESCRIPTIONS = MappingProxyType({
+        "Stage I": "Small tumor, locally confined",
+        "Stage II": "Large tumor but no lymph node spread",
+        "Stage III": "Spread to nearby lymph nodes",
+        "Stage IVA": "Locally advanced disease",
+        "Stage IVC": "Distant metastasis"
+    })
+    
     def stage(self, features: MedicalFeatures) -> TNMStaging:
         """Calculate TNM staging for head and neck cancer."""
-        staging = TNMStaging()
-        
-        # Determine T stage
-        if features.tumor_size_cm <= 2:
-            staging.T = "T1"
-        elif features.tumor_size_cm <= 4:
-            staging.T = "T2"
-        else:
-            staging.T = "T3"
-        
-        # Determine N stage
-        if features.lymph_nodes_involved == 0:
-            staging.N = "N0"
-        elif features.lymph_nodes_involved == 1:
-            staging.N = "N1"
-        elif 2 <= features.lymph_nodes_involved <= 3:
-            staging.N = "N2"
-        else:
-            staging.N = "N3"
-        
-        # Determine M stage
-        staging.M = "M1" if features.distant_metastasis else "M0"
-        
-        # Calculate overall stage
-        if staging.M == "M1":
-            staging.stage = "Stage IV"
-            staging.substage = "C"
-        elif staging.T == "T1" and staging.N == "N0":
-            staging.stage = "Stage I"
-        elif staging.T in ["T1", "T2"] and staging.N in ["N1", "N2"]:
-            staging.stage = "Stage III"
-        elif staging.T == "T3" or staging.N == "N3":
-            staging.stage = "Stage IV"
-            staging.substage = "A"
-        else:
-            staging.stage = "Stage II"
+        t_idx = bisect_left(self._T_THRESHOLDS, features.tumor_size_cm)
+        n_idx = bisect_left(self._N_THRESHOLDS, features.lymph_nodes_involved)
+        m_idx = 1 if features.distant_metastasis else 0
+        return self._results[(t_idx, n_idx, m_idx)]
+    
+    def stage_batch(
+        self,
+        sizes: np.ndarray,
+        nodes: np.ndarray,
+        mets: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Stage many head and neck cancer patients at once.
         
-        staging.description = self.get_stage_description(staging)
-        return staging
+        Args:
+            sizes: Tumor sizes in cm
+            nodes: Involved lymph node counts
+            mets: Distant metastasis flags
+            
+        Returns:
+            Arrays of T, N and M codes and full stages, one entry per patient
+        """
+        t_idx = np.searchsorted(self._T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+        n_idx = np.searchsorted(self._N_THRESHOLDS, np.asarray(nodes), side="left")
+        m_idx = np.asarray(mets, dtype=bool).astype(np.intp)
+        return self._lookup_batch(t_idx, n_idx, m_idx)
     
     def get_stage_description(self, staging: TNMStaging) -> str:
         """Get description for head and neck cancer staging."""
-        descriptions = {
-            "Stage I": "Small tumor, locally confined",
-            "Stage II": "Large tumor but no lymph node spread",
-            "Stage III": "Spread to nearby lymph nodes",
-            "Stage IVA": "Locally advanced disease",
-            "Stage IVC": "Distant metastasis"
-        }
-        
-        full_stage = staging.get_full_stage()
-        return descriptions.get(full_stage, staging.stage)
+        return self._DESCRIPTIONS.get(staging.get_full_stage(), staging.stage)
+
+
+# Keyed on TNMStaging.stage, which never carries the substage letter
+_PROGNOSIS_BY_STAGE = MappingProxyType({
+    "Stage I": "Generally good prognosis",
+    "Stage II": "Moderate prognosis",
+    "Stage III": "Guarded prognosis",
+    "Stage IV": "Serious prognosis"
+})
+
+# Stagers are stateless, so every StagingEngine shares one read-only registry
+_STAGERS = MappingProxyType({
+    "gallbladder": GallbladderCancerStager(),
+    "esophageal": EsophagealCancerStager(),
+    "breast": BreastCancerStager(),
+    "lung": LungCancerStager(),
+    "colorectal": ColorectalCancerStager(),
+    "head and neck": HeadNeckCancerStager()
+})
+
+# Spellings of each cancer type resolved up front to the stager's bound
+# stage function, so dispatch is a single get() and a direct call
+_STAGE_FUNCS: Mapping[str, Callable[[MedicalFeatures], TNMStaging]] = MappingProxyType({
+    variant: stager.stage
+    for cancer_type, stager in _STAGERS.items()
+    for spelling in (cancer_type, cancer_type.replace(" ", "_"))
+    for variant in (spelling, spelling.capitalize(), spelling.title(), spelling.upper())
+})
+
+
+@lru_cache(maxsize=4096)
+def _staging_cached(
+    cancer_type: str,
+    tumor_size_cm: float,
+    lymph_nodes_involved: int,
+    distant_metastasis: bool,
+    liver_invasion: bool,
+    tumor_depth: str
+) -> TNMStaging:
+    """Stage a supported cancer type, memoized on the fields staging reads."""
+    features = MedicalFeatures(
+        cancer_type=cancer_type,
+        tumor_size_cm=tumor_size_cm,
+        lymph_nodes_involved=lymph_nodes_involved,
+        distant_metastasis=distant_metastasis,
+        liver_invasion=liver_invasion,
+        tumor_depth=tumor_depth
+    )
+    return _STAGE_FUNCS[cancer_type](features)
 
 
 class StagingEngine:
     """Main staging engine that coordinates cancer-specific stagers."""
     
-    def __init__(self):
-        """Initialize the staging engine with cancer-specific stagers."""
-        self.stagers = {
-            "gallbladder": GallbladderCancerStager(),
-            "esophageal": EsophagealCancerStager(),
-            "breast": BreastCancerStager(),
-            "lung": LungCancerStager(),
-            "colorectal": ColorectalCancerStager(),
-            "head and neck": HeadNeckCancerStager()
-        }
+    stagers: Mapping[str, CancerStager] = _STAGERS
     
-    @st.cache_data(ttl=3600)
-    def calculate_staging(_self, features: MedicalFeatures) -> TNMStaging:
+    def calculate_staging(self, features: MedicalFeatures) -> TNMStaging:
         """
         Calculate TNM staging based on extracted features.
         
@@ -446,22 +615,26 @@ class StagingEngine:
                 raise StagingError(ERROR_MESSAGES["cancer_type_not_found"])
             
             # Check if cancer type is supported
-            if features.cancer_type not in _self.stagers:
-                logger.warning(f"Unsupported cancer type: {features.cancer_type}")
+            if features.cancer_type not in _STAGE_FUNCS:
+                logger.warning("Unsupported cancer type: %s", features.cancer_type)
                 return TNMStaging(
                     stage="Not Available",
                     description=f"{features.cancer_type} ক্যান্সারের জন্য স্টেজিং এখনও উপলব্ধ নয়"
                 )
             
-            # Get appropriate stager
-            stager = _self.stagers[features.cancer_type]
-            
             # Calculate staging
-            staging = stager.stage(features)
+            staging = _staging_cached(
+                features.cancer_type,
+                features.tumor_size_cm,
+                features.lymph_nodes_involved,
+                features.distant_metastasis,
+                features.liver_invasion,
+                features.tumor_depth
+            )
             
             logger.info(
-                f"Staging calculated for {features.cancer_type}: "
-                f"T{staging.T} N{staging.N} M{staging.M} - {staging.get_full_stage()}"
+                "Staging calculated for %s: %s %s %s - %s",
+                features.cancer_type, staging.T, staging.N, staging.M, staging.get_full_stage()
             )
             
             return staging
@@ -469,7 +642,7 @@ class StagingEngine:
         except OncoStagingError:
             raise
         except Exception as e:
-            logger.error(f"Unexpected error in staging calculation: {e}")
+            logger.error("Unexpected error in staging calculation: %s", e)
             raise StagingError(ERROR_MESSAGES["staging_error"])
     
     def get_staging_summary(self, staging: TNMStaging, cancer_type: str) -> Dict[str, Any]:
@@ -488,13 +661,4 @@ class StagingEngine:
     
     def _get_prognosis_indicator(self, stage: str) -> str:
         """Get general prognosis indicator based on stage."""
-        if "I" in stage and "V" not in stage:
-            return "Generally good prognosis"
-        elif "II" in stage:
-            return "Moderate prognosis"
-        elif "III" in stage:
-            return "Guarded prognosis"
-        elif "IV" in stage:
-            return "Serious prognosis"
-        else:
-            return "Prognosis information not available"
+        return _PROGNOSIS_BY_STAGE.get(stage, "Prognosis information not available")
@@ -7,9 +7,10 @@ def test_docx(file_path):
             processor = DocumentProcessor()
             result = processor.process_document(f)
             print("Document processed successfully!")
-            print(f"Extracted text length: {len(result.get('text', ''))} characters")
+            text = result.get('text', '')
+            print(f"Extracted text length: {len(text)} characters")
             print("First 500 characters:")
-            print(result.get('text', '')[:500])
+            print(text[:500])
     except Exception as e:
         print(f"Error processing document: {str(e)}")
         import traceback
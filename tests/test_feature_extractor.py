@@ -0,0 +1,26 @@
+"""
+Tests for the MedicalFeatures data class.
+"""
+
+from feature_extractor import MedicalFeatures
+from staging_engine import EsophagealCancerStager
+
+
+class TestTumorDepth:
+    """Tumor depth is lowercased however it is set, since stagers match it exactly."""
+
+    def test_constructor_lowercases_depth(self):
+        assert MedicalFeatures(tumor_depth="Submucosa").tumor_depth == "submucosa"
+
+    def test_assignment_lowercases_depth(self):
+        features = MedicalFeatures(cancer_type="esophageal")
+        features.tumor_depth = "Mucosa"
+
+        assert features.tumor_depth == "mucosa"
+        assert EsophagealCancerStager().stage(features).T == "T1a"
+
+    def test_none_depth_is_empty(self):
+        features = MedicalFeatures(cancer_type="esophageal", tumor_depth=None)
+
+        assert features.tumor_depth == ""
+        assert EsophagealCancerStager().stage(features).T == "Tx"
@@ -0,0 +1,97 @@
+"""
+Tests for pattern-based extraction in the medical NER module.
+"""
+
+import pytest
+
+from modules.medical_ner_module import MedicalExtractionResult, MedicalNERModule, MedicalPatternMatcher
+
+
+@pytest.fixture(scope="module")
+def pattern_matcher():
+    return MedicalPatternMatcher()
+
+
+def _texts(pattern_entities, label):
+    return [entity.text for entity in pattern_entities[label]]
+
+
+class TestOverlappingMatches:
+    """Earlier patterns of a label keep priority over broader, overlapping ones."""
+
+    def test_generic_histology_beats_diagnosis_phrase(self, pattern_matcher):
+        entities = pattern_matcher.extract_patterns("Diagnosis: invasive ductal carcinoma breast cancer")
+        assert _texts(entities, "cancer_type")[0] == "carcinoma"
+
+    def test_histology_beats_site_carcinoma(self, pattern_matcher):
+        entities = pattern_matcher.extract_patterns("58 year old woman with lung adenocarcinoma")
+        assert _texts(entities, "cancer_type") == ["adenocarcinoma"]
+
+    def test_non_overlapping_matches_are_all_kept(self, pattern_matcher):
+        entities = pattern_matcher.extract_patterns("Staging cT2 N1 M0, stage IIB")
+        assert _texts(entities, "tnm_staging") == ["cT2", "N1", "M0", "IIB"]
+
+
+COVERED_REPORT = (
+    "58 year old woman with lung adenocarcinoma. Primary mass SUV max 8.4. "
+    "3 positive lymph nodes in the mediastinum. Metastatic disease to the liver. "
+    "Staging: cT2 N1 M1, stage IVA."
+)
+
+
+@pytest.fixture
+def ner_module(monkeypatch):
+    module = MedicalNERModule()
+    llm_calls = []
+
+    def fake_llm(text):
+        llm_calls.append(text)
+        result = MedicalExtractionResult()
+        result.extraction_metadata = {"extraction_method": "deepseek_llm", "overall_confidence": 0.9}
+        return result
+
+    monkeypatch.setattr(module.deepseek_ner, "extract_structured_data", fake_llm)
+    module.llm_calls = llm_calls
+    return module
+
+
+class TestLLMSkip:
+    """The DeepSeek call is skipped only when the patterns cover every key field."""
+
+    def test_covered_report_skips_llm(self, ner_module):
+        result = ner_module.extract_medical_data(COVERED_REPORT, use_llm=True)
+
+        assert ner_module.llm_calls == []
+        assert result.extraction_metadata["llm_skipped"] is True
+        assert result.patient_info["age"] == "58"
+        assert result.cancer_info["cancer_type"] == "adenocarcinoma"
+        assert result.tnm_staging["t_stage"] == "cT2"
+        assert result.tnm_staging["n_stage"] == "N1"
+        assert result.tnm_staging["m_stage"] == "M1"
+        assert result.clinical_findings["lymph_nodes_involved"] == "3"
+        assert result.clinical_findings["metastatic_sites"]
+        assert result.extraction_metadata["overall_confidence"] == pytest.approx(0.8)
+        assert {"age", "tnm_staging", "metastases"} <= {entity.label for entity in result.all_entities}
+
+    def test_unanchored_matches_call_llm(self, ner_module):
+        text = (
+            "Page 2 of 3. Sagittal T1-weighted images were obtained. Nodes N1, M0 per prior. "
+            "Known carcinoma. 2 lymph nodes enlarged. Metastatic focus in bone. SUV 3.1"
+        )
+        result = ner_module.extract_medical_data(text, use_llm=True)
+
+        assert ner_module.llm_calls == [text]
+        assert result.extraction_metadata["llm_used"] is True
+        assert result.extraction_metadata["llm_skipped"] is False
+
+    def test_missing_metastases_calls_llm(self, ner_module):
+        text = COVERED_REPORT.replace("Metastatic disease to the liver. ", "")
+        ner_module.extract_medical_data(text, use_llm=True)
+
+        assert ner_module.llm_calls == [text]
+
+    def test_llm_disabled_never_calls_llm(self, ner_module):
+        result = ner_module.extract_medical_data("Page 2 of 3. Sagittal T1-weighted images.", use_llm=False)
+
+        assert ner_module.llm_calls == []
+        assert result.extraction_metadata["llm_skipped"] is False
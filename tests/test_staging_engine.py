@@ -0,0 +1,44 @@
+"""
+Tests for the staging engine.
+"""
+
+import pytest
+
+from feature_extractor import MedicalFeatures
+from staging_engine import StagingEngine, TNMStaging
+
+
+@pytest.fixture(scope="module")
+def engine():
+    return StagingEngine()
+
+
+class TestPrognosisIndicator:
+    """The prognosis indicator is looked up by stage, ignoring the substage letter."""
+
+    @pytest.mark.parametrize("stage, prognosis", [
+        ("Stage I", "Generally good prognosis"),
+        ("Stage II", "Moderate prognosis"),
+        ("Stage III", "Guarded prognosis"),
+        ("Stage IV", "Serious prognosis"),
+        ("Stage Unknown", "Prognosis information not available"),
+    ])
+    def test_indicator_by_stage(self, engine, stage, prognosis):
+        summary = engine.get_staging_summary(TNMStaging(stage=stage, substage="A"), "lung")
+        assert summary["prognosis_indicator"] == prognosis
+
+
+class TestCancerTypeSpellings:
+    """Capitalized and underscored spellings of a supported cancer type are staged."""
+
+    @pytest.mark.parametrize("cancer_type", ["breast", "Breast", "BREAST", "head and neck", "head_and_neck", "Head And Neck"])
+    def test_spelling_is_staged(self, engine, cancer_type):
+        staging = engine.calculate_staging(MedicalFeatures(cancer_type=cancer_type, tumor_size_cm=3, lymph_nodes_involved=1))
+
+        assert staging.stage != "Not Available"
+        assert (staging.T, staging.N, staging.M) == ("T2", "N1", "M0")
+
+    def test_unsupported_type_is_not_available(self, engine):
+        staging = engine.calculate_staging(MedicalFeatures(cancer_type="kidney", tumor_size_cm=3))
+
+        assert staging.stage == "Not Available"
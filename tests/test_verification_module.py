@@ -0,0 +1,32 @@
+"""
+Tests for field validation in the verification module.
+"""
+
+import pytest
+
+from modules.verification_module import DataValidator
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return DataValidator()
+
+
+class TestTumorSizeValidation:
+    """Sizes in cm or mm, single or multi-dimensional, validate against the 50 cm limit."""
+
+    @pytest.mark.parametrize("value", ["45 mm", "3.2cm", "3.2 cm", "2.1 x 1.8 cm", "12 x 8 x 5 mm"])
+    def test_valid_sizes(self, validator, value):
+        assert validator.validate_field("tumor_size_cm", value) == (True, "", 0.9)
+
+    def test_millimetres_are_converted_before_range_check(self, validator):
+        is_valid, message, _ = validator.validate_field("tumor_size_cm", "600 mm")
+
+        assert not is_valid
+        assert "unusually large" in message
+
+    def test_unparseable_size_is_rejected(self, validator):
+        is_valid, message, _ = validator.validate_field("tumor_size_cm", "large")
+
+        assert not is_valid
+        assert "format" in message
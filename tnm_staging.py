@@ -1,245 +1,426 @@
-# tnm_staging.py
-
-def determine_tnm_stage(cancer_type: str, features: dict) -> dict:
-    cancer_type = cancer_type.lower()
-
-    if cancer_type == "gallbladder":
-        return stage_gallbladder_cancer(features)
-    elif cancer_type == "esophageal":
-        return stage_esophageal_cancer(features)
-    elif cancer_type == "breast":
-        return stage_breast_cancer(features)
-    elif cancer_type == "lung":
-        return stage_lung_cancer(features)
-    elif cancer_type == "colorectal":
-        return stage_colorectal_cancer(features)
-    elif cancer_type in ["head and neck", "oral cavity", "oropharynx"]:
-        return stage_head_neck_cancer(features)
-    else:
-        return {"T": "Unknown", "N": "Unknown", "M": "Unknown", "Stage": "Not available"}
-
-
-def stage_gallbladder_cancer(features):
-    t_size = features.get("tumor_size_cm", 0)
-    liver_invasion = features.get("liver_invasion", False)
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    if liver_invasion:
-        T = "T3"
-    elif t_size > 2:
-        T = "T2"
-    elif t_size > 0:
-        T = "T1"
-    else:
-        T = "Tx"
-
-    if nodes == 0:
-        N = "N0"
-    elif 1 <= nodes <= 3:
-        N = "N1"
-    else:
-        N = "N2"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IVB"
-    elif T == "T3" and N != "N0":
-        Stage = "Stage IVA"
-    elif T == "T3":
-        Stage = "Stage IIIB"
-    elif T == "T2" and N == "N0":
-        Stage = "Stage II"
-    elif T in ["T1", "T2"] and N != "N0":
-        Stage = "Stage IIIA"
-    elif T == "T1" and N == "N0":
-        Stage = "Stage I"
-    else:
-        Stage = "Stage Unknown"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
-
-
-def stage_esophageal_cancer(features):
-    t_depth = features.get("tumor_depth", "")
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    T = {
-        "mucosa": "T1",
-        "submucosa": "T1b",
-        "muscularis": "T2",
-        "adventitia": "T3",
-        "adjacent structures": "T4"
-    }.get(t_depth.lower(), "Tx")
-
-    if nodes == 0:
-        N = "N0"
-    elif 1 <= nodes <= 2:
-        N = "N1"
-    elif 3 <= nodes <= 6:
-        N = "N2"
-    else:
-        N = "N3"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IVB"
-    elif T == "T4" or N == "N3":
-        Stage = "Stage IVA"
-    elif T in ["T2", "T3"] and N in ["N0", "N1"]:
-        Stage = "Stage II"
-    elif T == "T1" and N == "N0":
-        Stage = "Stage I"
-    else:
-        Stage = "Stage III"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
-
-
-def stage_breast_cancer(features):
-    size = features.get("tumor_size_cm", 0)
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    if size <= 2:
-        T = "T1"
-    elif size <= 5:
-        T = "T2"
-    else:
-        T = "T3"
-
-    if nodes == 0:
-        N = "N0"
-    elif nodes <= 3:
-        N = "N1"
-    elif nodes <= 9:
-        N = "N2"
-    else:
-        N = "N3"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IV"
-    elif T == "T1" and N == "N0":
-        Stage = "Stage I"
-    elif T in ["T1", "T2"] and N == "N1":
-        Stage = "Stage II"
-    elif T == "T3" or N in ["N2", "N3"]:
-        Stage = "Stage III"
-    else:
-        Stage = "Stage Unknown"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
-
-
-def stage_lung_cancer(features):
-    size = features.get("tumor_size_cm", 0)
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    if size <= 3:
-        T = "T1"
-    elif size <= 5:
-        T = "T2"
-    elif size <= 7:
-        T = "T3"
-    else:
-        T = "T4"
-
-    if nodes == 0:
-        N = "N0"
-    elif nodes <= 3:
-        N = "N1"
-    else:
-        N = "N2"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IV"
-    elif T == "T1" and N == "N0":
-        Stage = "Stage I"
-    elif T in ["T2", "T3"] and N in ["N0", "N1"]:
-        Stage = "Stage II"
-    elif T in ["T3", "T4"] or N == "N2":
-        Stage = "Stage III"
-    else:
-        Stage = "Stage Unknown"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
-
-
-def stage_colorectal_cancer(features):
-    depth = features.get("tumor_depth", "")
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    T = {
-        "submucosa": "T1",
-        "muscularis propria": "T2",
-        "subserosa": "T3",
-        "peritoneum/invasion": "T4"
-    }.get(depth.lower(), "Tx")
-
-    if nodes == 0:
-        N = "N0"
-    elif nodes <= 3:
-        N = "N1"
-    else:
-        N = "N2"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IV"
-    elif T in ["T1", "T2"] and N == "N0":
-        Stage = "Stage I"
-    elif T == "T3" and N == "N0":
-        Stage = "Stage II"
-    elif N in ["N1", "N2"]:
-        Stage = "Stage III"
-    else:
-        Stage = "Stage Unknown"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
-
-
-def stage_head_neck_cancer(features):
-    size = features.get("tumor_size_cm", 0)
-    nodes = features.get("lymph_nodes_involved", 0)
-    distant_mets = features.get("distant_metastasis", False)
-
-    if size <= 2:
-        T = "T1"
-    elif size <= 4:
-        T = "T2"
-    else:
-        T = "T3"
-
-    if nodes == 0:
-        N = "N0"
-    elif nodes == 1:
-        N = "N1"
-    elif 2 <= nodes <= 3:
-        N = "N2"
-    else:
-        N = "N3"
-
-    M = "M1" if distant_mets else "M0"
-
-    if M == "M1":
-        Stage = "Stage IVC"
-    elif T == "T1" and N == "N0":
-        Stage = "Stage I"
-    elif T in ["T1", "T2"] and N in ["N1", "N2"]:
-        Stage = "Stage II–III"
-    elif T == "T3" or N == "N3":
-        Stage = "Stage IV"
-    else:
-        Stage = "Stage Unknown"
-
-    return {"T": T, "N": N, "M": M, "Stage": Stage}
+# tnm_staging.py
+
+import sys
+from bisect import bisect_left
+from functools import lru_cache
+from types import MappingProxyType
+from typing import Mapping, NamedTuple, Union
+
+import numpy as np
+
+# Staging results are memoized and shared, so they are returned as read-only
+# mappings rather than copied per call
+
+# Shared read-only result for cancer types without a staging function
+_UNKNOWN_RESULT = MappingProxyType({"T": "Unknown", "N": "Unknown", "M": "Unknown", "Stage": "Not available"})
+
+_M_LABELS = ("M0", "M1")
+
+# Stage-grouping rules are (T labels, N labels, M labels, stage) tuples where
+# _ANY matches every label; the first matching rule wins and each rule set
+# ends with a catch-all
+_ANY = None
+
+# Label groups shared by the stage-grouping rules
+_T12 = frozenset(("T1", "T2"))
+_T23 = frozenset(("T2", "T3"))
+_T34 = frozenset(("T3", "T4"))
+_N01 = frozenset(("N0", "N1"))
+_N12 = frozenset(("N1", "N2"))
+_N23 = frozenset(("N2", "N3"))
+
+
+@lru_cache(maxsize=64)
+def _normalize(label):
+    # Cancer types and depths come from a handful of keywords, so lowercase each once
+    return sys.intern(label.lower())
+
+
+def _first_matching_stage(rules, T, N, M):
+    for t_labels, n_labels, m_labels, stage in rules:
+        if ((t_labels is _ANY or T in t_labels)
+                and (n_labels is _ANY or N in n_labels)
+                and (m_labels is _ANY or M in m_labels)):
+            return stage
+    raise ValueError(f"No staging rule matches {T} {N} {M}")
+
+
+def _build_stage_table(t_labels, n_labels, rules):
+    # Every (T, N, M) combination resolved once at import, flattened so the
+    # stage for label indices (t, n, m) sits at (t * len(n_labels) + n) * len(_M_LABELS) + m
+    return tuple(
+        _first_matching_stage(rules, T, N, M) for T in t_labels for N in n_labels for M in _M_LABELS
+    )
+
+
+def _build_batch_tables(t_labels, n_labels, stage_table):
+    # Label and stage tables as arrays, so batch staging only fancy-indexes
+    return np.array(t_labels), np.array(n_labels), np.array(_M_LABELS), np.array(stage_table)
+
+
+def _lookup_batch(t, n, m, batch_tables):
+    # Vectorised counterpart of the flat-index lookup in the per-patient functions
+    t_arr, n_arr, m_arr, stage_arr = batch_tables
+    flat = (t * len(n_arr) + n) * len(m_arr) + m
+    return t_arr[t], n_arr[n], m_arr[m], stage_arr[flat]
+
+
+class StagingFeatures(NamedTuple):
+    size: float = 0.0
+    nodes: int = 0
+    mets: bool = False
+    depth: str = ""
+    liver_inv: bool = False
+
+    @classmethod
+    def from_dict(cls, features: dict) -> "StagingFeatures":
+        get = features.get
+        return cls(
+            get("tumor_size_cm", 0),
+            get("lymph_nodes_involved", 0),
+            get("distant_metastasis", False),
+            get("tumor_depth", ""),
+            get("liver_invasion", False),
+        )
+
+
+def determine_tnm_stage(cancer_type: str, features: Union[dict, StagingFeatures]) -> Mapping[str, str]:
+    if isinstance(features, dict):
+        features = StagingFeatures.from_dict(features)
+    stage = _DISPATCH.get(_normalize(cancer_type))
+    if stage is None:
+        return _UNKNOWN_RESULT
+    return stage(features)
+
+
+# Size (cm) and node-count thresholds: label i covers values above
+# threshold i-1 up to and including threshold i
+_GALLBLADDER_T_THRESHOLDS = (0, 2)
+# Index 3 (T3) is only reached through liver invasion
+_GALLBLADDER_T_LABELS = ("Tx", "T1", "T2", "T3")
+_GALLBLADDER_N_THRESHOLDS = (0, 3)
+_GALLBLADDER_N_LABELS = ("N0", "N1", "N2")
+
+_GALLBLADDER_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IVB"),
+    (("T3",), _N12, _ANY, "Stage IVA"),
+    (("T3",), _ANY, _ANY, "Stage IIIB"),
+    (("T2",), ("N0",), _ANY, "Stage II"),
+    (_T12, _N12, _ANY, "Stage IIIA"),
+    (("T1",), ("N0",), _ANY, "Stage I"),
+    (_ANY, _ANY, _ANY, "Stage Unknown"),
+)
+
+_GALLBLADDER_STAGE = _build_stage_table(_GALLBLADDER_T_LABELS, _GALLBLADDER_N_LABELS, _GALLBLADDER_RULES)
+_GALLBLADDER_BATCH = _build_batch_tables(_GALLBLADDER_T_LABELS, _GALLBLADDER_N_LABELS, _GALLBLADDER_STAGE)
+
+
+def stage_gallbladder_cancer(features):
+    return _stage_gallbladder_cached(features.size, features.liver_inv, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_gallbladder_cached(t_size, liver_invasion, nodes, distant_mets):
+    t = 3 if liver_invasion else bisect_left(_GALLBLADDER_T_THRESHOLDS, t_size)
+    n = bisect_left(_GALLBLADDER_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _GALLBLADDER_T_LABELS[t],
+        "N": _GALLBLADDER_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _GALLBLADDER_STAGE[(t * len(_GALLBLADDER_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_gallbladder_batch(sizes, nodes, liver_invasion, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.where(
+        np.asarray(liver_invasion, dtype=bool),
+        3,
+        np.searchsorted(_GALLBLADDER_T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left"),
+    )
+    n = np.searchsorted(_GALLBLADDER_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _GALLBLADDER_BATCH)
+
+
+_ESOPHAGEAL_T_LABELS = ("Tx", "T1", "T1b", "T2", "T3", "T4")
+# Depth keyword -> index into _ESOPHAGEAL_T_LABELS; unknown depth is Tx
+_ESOPHAGEAL_DEPTH_T = {
+    "mucosa": 1,
+    "submucosa": 2,
+    "muscularis": 3,
+    "adventitia": 4,
+    "adjacent structures": 5
+}
+_ESOPHAGEAL_N_THRESHOLDS = (0, 2, 6)
+_ESOPHAGEAL_N_LABELS = ("N0", "N1", "N2", "N3")
+
+_ESOPHAGEAL_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IVB"),
+    (("T4",), _ANY, _ANY, "Stage IVA"),
+    (_ANY, ("N3",), _ANY, "Stage IVA"),
+    (_T23, _N01, _ANY, "Stage II"),
+    (("T1",), ("N0",), _ANY, "Stage I"),
+    (_ANY, _ANY, _ANY, "Stage III"),
+)
+
+_ESOPHAGEAL_STAGE = _build_stage_table(_ESOPHAGEAL_T_LABELS, _ESOPHAGEAL_N_LABELS, _ESOPHAGEAL_RULES)
+_ESOPHAGEAL_BATCH = _build_batch_tables(_ESOPHAGEAL_T_LABELS, _ESOPHAGEAL_N_LABELS, _ESOPHAGEAL_STAGE)
+
+
+def stage_esophageal_cancer(features):
+    return _stage_esophageal_cached(features.depth, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_esophageal_cached(t_depth, nodes, distant_mets):
+    t = _ESOPHAGEAL_DEPTH_T.get(_normalize(t_depth), 0)
+    n = bisect_left(_ESOPHAGEAL_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _ESOPHAGEAL_T_LABELS[t],
+        "N": _ESOPHAGEAL_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _ESOPHAGEAL_STAGE[(t * len(_ESOPHAGEAL_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_esophageal_batch(depths, nodes, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.fromiter((_ESOPHAGEAL_DEPTH_T.get(_normalize(d), 0) for d in depths), dtype=np.intp, count=len(depths))
+    n = np.searchsorted(_ESOPHAGEAL_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _ESOPHAGEAL_BATCH)
+
+
+_BREAST_T_THRESHOLDS = (2, 5)
+_BREAST_T_LABELS = ("T1", "T2", "T3")
+_BREAST_N_THRESHOLDS = (0, 3, 9)
+_BREAST_N_LABELS = ("N0", "N1", "N2", "N3")
+
+_BREAST_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IV"),
+    (("T1",), ("N0",), _ANY, "Stage I"),
+    (_T12, ("N1",), _ANY, "Stage II"),
+    (("T3",), _ANY, _ANY, "Stage III"),
+    (_ANY, _N23, _ANY, "Stage III"),
+    (_ANY, _ANY, _ANY, "Stage Unknown"),
+)
+
+_BREAST_STAGE = _build_stage_table(_BREAST_T_LABELS, _BREAST_N_LABELS, _BREAST_RULES)
+_BREAST_BATCH = _build_batch_tables(_BREAST_T_LABELS, _BREAST_N_LABELS, _BREAST_STAGE)
+
+
+def stage_breast_cancer(features):
+    return _stage_breast_cached(features.size, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_breast_cached(size, nodes, distant_mets):
+    t = bisect_left(_BREAST_T_THRESHOLDS, size)
+    n = bisect_left(_BREAST_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _BREAST_T_LABELS[t],
+        "N": _BREAST_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _BREAST_STAGE[(t * len(_BREAST_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_breast_batch(sizes, nodes, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.searchsorted(_BREAST_T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+    n = np.searchsorted(_BREAST_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _BREAST_BATCH)
+
+
+_LUNG_T_THRESHOLDS = (3, 5, 7)
+_LUNG_T_LABELS = ("T1", "T2", "T3", "T4")
+_LUNG_N_THRESHOLDS = (0, 3)
+_LUNG_N_LABELS = ("N0", "N1", "N2")
+
+_LUNG_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IV"),
+    (("T1",), ("N0",), _ANY, "Stage I"),
+    (_T23, _N01, _ANY, "Stage II"),
+    (_T34, _ANY, _ANY, "Stage III"),
+    (_ANY, ("N2",), _ANY, "Stage III"),
+    (_ANY, _ANY, _ANY, "Stage Unknown"),
+)
+
+_LUNG_STAGE = _build_stage_table(_LUNG_T_LABELS, _LUNG_N_LABELS, _LUNG_RULES)
+_LUNG_BATCH = _build_batch_tables(_LUNG_T_LABELS, _LUNG_N_LABELS, _LUNG_STAGE)
+
+
+def stage_lung_cancer(features):
+    return _stage_lung_cached(features.size, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_lung_cached(size, nodes, distant_mets):
+    t = bisect_left(_LUNG_T_THRESHOLDS, size)
+    n = bisect_left(_LUNG_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _LUNG_T_LABELS[t],
+        "N": _LUNG_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _LUNG_STAGE[(t * len(_LUNG_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_lung_batch(sizes, nodes, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.searchsorted(_LUNG_T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+    n = np.searchsorted(_LUNG_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _LUNG_BATCH)
+
+
+_COLORECTAL_T_LABELS = ("Tx", "T1", "T2", "T3", "T4")
+# Depth keyword -> index into _COLORECTAL_T_LABELS; unknown depth is Tx
+_COLORECTAL_DEPTH_T = {
+    "submucosa": 1,
+    "muscularis propria": 2,
+    "subserosa": 3,
+    "peritoneum/invasion": 4
+}
+_COLORECTAL_N_THRESHOLDS = (0, 3)
+_COLORECTAL_N_LABELS = ("N0", "N1", "N2")
+
+_COLORECTAL_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IV"),
+    (_T12, ("N0",), _ANY, "Stage I"),
+    (("T3",), ("N0",), _ANY, "Stage II"),
+    (_ANY, _N12, _ANY, "Stage III"),
+    (_ANY, _ANY, _ANY, "Stage Unknown"),
+)
+
+_COLORECTAL_STAGE = _build_stage_table(_COLORECTAL_T_LABELS, _COLORECTAL_N_LABELS, _COLORECTAL_RULES)
+_COLORECTAL_BATCH = _build_batch_tables(_COLORECTAL_T_LABELS, _COLORECTAL_N_LABELS, _COLORECTAL_STAGE)
+
+
+def stage_colorectal_cancer(features):
+    return _stage_colorectal_cached(features.depth, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_colorectal_cached(depth, nodes, distant_mets):
+    t = _COLORECTAL_DEPTH_T.get(_normalize(depth), 0)
+    n = bisect_left(_COLORECTAL_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _COLORECTAL_T_LABELS[t],
+        "N": _COLORECTAL_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _COLORECTAL_STAGE[(t * len(_COLORECTAL_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_colorectal_batch(depths, nodes, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.fromiter((_COLORECTAL_DEPTH_T.get(_normalize(d), 0) for d in depths), dtype=np.intp, count=len(depths))
+    n = np.searchsorted(_COLORECTAL_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _COLORECTAL_BATCH)
+
+
+_HEAD_NECK_T_THRESHOLDS = (2, 4)
+_HEAD_NECK_T_LABELS = ("T1", "T2", "T3")
+_HEAD_NECK_N_THRESHOLDS = (0, 1, 3)
+_HEAD_NECK_N_LABELS = ("N0", "N1", "N2", "N3")
+
+_HEAD_NECK_RULES = (
+    (_ANY, _ANY, ("M1",), "Stage IVC"),
+    (("T1",), ("N0",), _ANY, "Stage I"),
+    (_T12, _N12, _ANY, "Stage II–III"),
+    (("T3",), _ANY, _ANY, "Stage IV"),
+    (_ANY, ("N3",), _ANY, "Stage IV"),
+    (_ANY, _ANY, _ANY, "Stage Unknown"),
+)
+
+_HEAD_NECK_STAGE = _build_stage_table(_HEAD_NECK_T_LABELS, _HEAD_NECK_N_LABELS, _HEAD_NECK_RULES)
+_HEAD_NECK_BATCH = _build_batch_tables(_HEAD_NECK_T_LABELS, _HEAD_NECK_N_LABELS, _HEAD_NECK_STAGE)
+
+
+def stage_head_neck_cancer(features):
+    return _stage_head_neck_cached(features.size, features.nodes, features.mets)
+
+
+@lru_cache(maxsize=4096)
+def _stage_head_neck_cached(size, nodes, distant_mets):
+    t = bisect_left(_HEAD_NECK_T_THRESHOLDS, size)
+    n = bisect_left(_HEAD_NECK_N_THRESHOLDS, nodes)
+    m = 1 if distant_mets else 0
+
+    return MappingProxyType({
+        "T": _HEAD_NECK_T_LABELS[t],
+        "N": _HEAD_NECK_N_LABELS[n],
+        "M": _M_LABELS[m],
+        "Stage": _HEAD_NECK_STAGE[(t * len(_HEAD_NECK_N_LABELS) + n) * len(_M_LABELS) + m]
+    })
+
+
+def stage_head_neck_batch(sizes, nodes, distant_mets):
+    # Arrays of T, N, M and Stage labels, one entry per patient
+    t = np.searchsorted(_HEAD_NECK_T_THRESHOLDS, np.asarray(sizes, dtype=float), side="left")
+    n = np.searchsorted(_HEAD_NECK_N_THRESHOLDS, np.asarray(nodes), side="left")
+    m = np.asarray(distant_mets, dtype=bool).astype(np.intp)
+    return _lookup_batch(t, n, m, _HEAD_NECK_BATCH)
+
+
+# Lowercased cancer type (including head and neck aliases) -> staging function
+_DISPATCH = {
+    "gallbladder": stage_gallbladder_cancer,
+    "esophageal": stage_esophageal_cancer,
+    "breast": stage_breast_cancer,
+    "lung": stage_lung_cancer,
+    "colorectal": stage_colorectal_cancer,
+    "head and neck": stage_head_neck_cancer,
+    "oral cavity": stage_head_neck_cancer,
+    "oropharynx": stage_head_neck_cancer,
+}
+
+# Lowercased cancer type -> batch staging over (sizes, nodes, mets, depths, liver_invasion)
+_BATCH_DISPATCH = {
+    "gallbladder": lambda sizes, nodes, mets, depths, liver: stage_gallbladder_batch(sizes, nodes, liver, mets),
+    "esophageal": lambda sizes, nodes, mets, depths, liver: stage_esophageal_batch(depths, nodes, mets),
+    "breast": lambda sizes, nodes, mets, depths, liver: stage_breast_batch(sizes, nodes, mets),
+    "lung": lambda sizes, nodes, mets, depths, liver: stage_lung_batch(sizes, nodes, mets),
+    "colorectal": lambda sizes, nodes, mets, depths, liver: stage_colorectal_batch(depths, nodes, mets),
+    "head and neck": lambda sizes, nodes, mets, depths, liver: stage_head_neck_batch(sizes, nodes, mets),
+}
+_BATCH_DISPATCH["oral cavity"] = _BATCH_DISPATCH["oropharynx"] = _BATCH_DISPATCH["head and neck"]
+
+
+def stage_cohort(cancer_types, sizes, nodes, distant_mets, depths=None, liver_invasion=None):
+    # Stage a mixed cohort by running each cancer type's rows through its
+    # batch function; returns T, N, M and Stage label arrays in input order
+    count = len(cancer_types)
+    sizes = np.asarray(sizes, dtype=float)
+    nodes = np.asarray(nodes)
+    distant_mets = np.asarray(distant_mets, dtype=bool)
+    depths = np.asarray(depths if depths is not None else [""] * count, dtype=object)
+    liver_invasion = np.asarray(
+        liver_invasion if liver_invasion is not None else np.zeros(count, dtype=bool), dtype=bool
+    )
+
+    results = tuple(np.full(count, _UNKNOWN_RESULT[key], dtype=object) for key in ("T", "N", "M", "Stage"))
+    types = np.array([_normalize(cancer_type) for cancer_type in cancer_types], dtype=object)
+    for cancer_type in set(types):
+        stage_batch = _BATCH_DISPATCH.get(cancer_type)
+        if stage_batch is None:
+            continue
+        rows = np.flatnonzero(types == cancer_type)
+        labels = stage_batch(sizes[rows], nodes[rows], distant_mets[rows], depths[rows], liver_invasion[rows])
+        for out, values in zip(results, labels):
+            out[rows] = values
+    return results